@@ -1,15 +1,18 @@
 from flask import Flask
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
-from threading import Thread, Event
-import time
 import json
 import os
 from pathlib import Path
 from config import Config
 from app.models import db, User
 
-def create_app():
+def create_app(with_scheduler=None):
+    """Create the Flask app.
+
+    with_scheduler: start the in-process auto-order scheduler; defaults to
+    Config.SCHEDULER_ENABLED. Scripts and tests should pass False.
+    """
     app = Flask(__name__)
     app.config.from_object(Config)
     
@@ -34,6 +37,9 @@ def create_app():
     # Create database tables
     with app.app_context():
         db.create_all()
+        # Fill an empty product link catalog from data/product_links.json
+        from app.product_links import seed_product_links
+        seed_product_links()
     
     # Custom template filters
     from datetime import datetime
@@ -96,54 +102,11 @@ def create_app():
     app.register_blueprint(meal_planning_bp, url_prefix='/meal-planning')
     app.register_blueprint(receipts_bp, url_prefix='/receipts')
 
-    # Background auto-order scheduler
-    stop_event = Event()
-
-    def run_scheduler():
-        from bot.green_shelf_bot import GreenShelfBot
-        while not stop_event.is_set():
-            try:
-                # Create application context for database operations
-                with app.app_context():
-                    # Get all users with auto-order enabled
-                    users = User.query.filter_by(auto_order_enabled=True).all()
-                    for user in users:
-                        if user.upi_id:
-                            # Check for low stock items
-                            low_stock_items = []
-                            for item in user.inventory_items:
-                                if item.is_low_stock():
-                                    low_stock_items.append(item.blinkit_query or item.name)
-                            
-                            if low_stock_items:
-                                try:
-                                    bot = GreenShelfBot(user.upi_id, user_id=user.id)
-                                    bot.process_items(low_stock_items)
-                                    if user.checkout_enabled:
-                                        bot.proceed_to_checkout_and_select_upi(user.upi_id)
-                                except Exception as e:
-                                    print(f"Auto-order failed for user {user.id}: {e}")
-                
-                # Sleep for the minimum interval among all users
-                min_interval = 60  # default 1 hour
-                with app.app_context():
-                    users = User.query.filter_by(auto_order_enabled=True).all()
-                    for user in users:
-                        if user.check_interval_minutes:
-                            min_interval = min(min_interval, user.check_interval_minutes)
-                
-                # Sleep in 1-second steps to allow quick shutdown
-                for _ in range(min_interval * 60):
-                    if stop_event.is_set():
-                        break
-                    time.sleep(1)
-                    
-            except Exception as e:
-                print(f"Scheduler error: {e}")
-                time.sleep(60)  # Wait 1 minute before retrying
-
-    # Start the scheduler thread in daemon mode so it doesn't block exit
-    t = Thread(target=run_scheduler, daemon=True)
-    t.start()
+    # Background auto-order scheduler (a DB lease keeps it to one per deployment)
+    if with_scheduler is None:
+        with_scheduler = app.config['SCHEDULER_ENABLED']
+    if with_scheduler:
+        from app.scheduler import start_scheduler
+        start_scheduler(app)
 
     return app
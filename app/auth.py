@@ -4,10 +4,15 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, BooleanField, SubmitField, IntegerField, TextAreaField, SelectMultipleField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, NumberRange
 from app.models import db, User, Notification
+from app.scheduler import mark_schedule_changed, wake_scheduler
+from app.cookie_store import save_user_cookies
 import json
 
 auth_bp = Blueprint('auth', __name__)
 
+# Preferences that affect when (or whether) the auto-order scheduler runs a user
+SCHEDULE_PREFERENCES = {'auto_order_enabled', 'check_interval_minutes'}
+
 class LoginForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired(), Length(min=4, max=20)])
     password = PasswordField('Password', validators=[DataRequired()])
@@ -139,8 +144,10 @@ def profile():
                 current_user.auto_order_enabled = form.auto_order_enabled.data
                 current_user.checkout_enabled = form.checkout_enabled.data
                 current_user.check_interval_minutes = form.check_interval_minutes.data
+                mark_schedule_changed(current_user.id)
                 
                 db.session.commit()
+                wake_scheduler()
                 flash('Preferences updated successfully!', 'success')
                 return redirect(url_for('auth.profile'))
             except Exception as e:
@@ -163,8 +170,15 @@ def onboarding():
 def capture_cookies():
     """Endpoint to receive Blinkit cookies from frontend"""
     try:
-        cookies_data = request.json.get('cookies', {})
-        current_user.blinkit_cookies = json.dumps(cookies_data)
+        cookies_data = (request.get_json(silent=True) or {}).get('cookies')
+        # Same shape as driver.get_cookies(): a list of {"name", "value", ...} dicts
+        if not isinstance(cookies_data, list) or not all(
+            isinstance(cookie, dict) and isinstance(cookie.get('name'), str) and isinstance(cookie.get('value'), str)
+            for cookie in cookies_data
+        ):
+            return jsonify({'success': False, 'message': 'cookies must be a list of {name, value} objects'}), 400
+        # Goes through the cookie store so this process's cached copy is replaced too
+        save_user_cookies(current_user, cookies_data)
         db.session.commit()
         
         # Create notification
@@ -201,7 +215,10 @@ def update_preference():
                 updated.append(key)
         
         if updated:
+            if set(updated) & SCHEDULE_PREFERENCES:
+                mark_schedule_changed(current_user.id)
             db.session.commit()
+            wake_scheduler()
             return jsonify({
                 'success': True, 
                 'message': f'Updated {", ".join(updated)}',
@@ -0,0 +1,129 @@
+"""Checkpointed bot runs.
+
+Every order pass (low-stock job or scheduler run) gets a ``BotRun`` row, and
+the bot writes one checkpoint per item as soon as it is added or fails,
+including the product page it resolved to. Each checkpoint is committed
+straight away, so it survives a Chrome crash or a killed worker.
+
+A pass that got through every item is closed: ``done`` if all were added,
+``failed`` otherwise. A pass that stopped part-way (an exception) is marked
+``interrupted`` and stays resumable until ``BOT_RUN_RESUME_MINUTES`` after the
+run was created, however often it is resumed. A process that died leaves its
+run ``running`` and its order lines ``pending``, which would keep the items out
+of every new order for the whole dedup window; ``recover_dead_runs`` settles
+those before the next pass de-duplicates. The next pass for that user takes the
+run over: items the interrupted pass added are reported without any browser
+work, and failed items reuse the URL it resolved. Checkpoints carry the order
+they were written for, so only the interrupted pass's own ones count.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.models import db, BotRun, Order
+from app.ordering import finish_order
+
+# A 'running' row untouched this long belongs to a pass that died, not a live one
+STALE_RUNNING_MINUTES = 10
+
+
+def _settle_dead_run(run):
+    run.status = 'interrupted'
+    order = db.session.get(Order, run.order_id) if run.order_id else None
+    if order is not None and order.status == 'pending':
+        checkpoints = run.get_items()
+        finish_order(order, [checkpoints.get(line.blinkit_query, {}).get('message', '') for line in order.lines])
+
+
+def abandon_order(order):
+    """Settle a pending order whose pass is known to be dead; the caller commits.
+
+    With a run attached, lines it checkpointed as added count as placed and the
+    run becomes resumable; otherwise every line fails.
+    """
+    run = BotRun.query.filter_by(order_id=order.id, status='running').first()
+    if run is not None:
+        _settle_dead_run(run)
+    elif order.status == 'pending':
+        finish_order(order, None)
+
+
+def recover_dead_runs(user_id):
+    """Close runs a dead pass left 'running' and settle their orders' lines; commits.
+
+    Lines the run's checkpoints show as added count as placed (they are in the
+    cart); the others fail, so the dedup window doesn't hide them and the next
+    pass resumes the run for them. Returns how many runs were recovered.
+    """
+    cutoff = datetime.utcnow() - timedelta(minutes=STALE_RUNNING_MINUTES)
+    runs = BotRun.query.filter(
+        BotRun.user_id == user_id,
+        BotRun.status == 'running',
+        BotRun.updated_at < cutoff,
+    ).all()
+    for run in runs:
+        _settle_dead_run(run)
+        logging.warning(f"Bot run {run.id} for user {user_id} was left running by a dead pass; marked interrupted")
+    if runs:
+        db.session.commit()
+    return len(runs)
+
+
+def start_run(user_id, order_id=None, window_minutes=None):
+    """The user's latest interrupted run created inside the window, or a new one; commits.
+
+    A resumed run keeps only the checkpoints of the pass that was interrupted
+    (those written for its order), so older passes' items are ordered afresh.
+    """
+    if window_minutes is None:
+        window_minutes = current_app.config.get('BOT_RUN_RESUME_MINUTES', 60)
+    now = datetime.utcnow()
+    run = BotRun.query.filter(
+        BotRun.user_id == user_id,
+        BotRun.status == 'interrupted',
+        BotRun.created_at >= now - timedelta(minutes=window_minutes),
+    ).order_by(BotRun.id.desc()).first()
+    if run is None:
+        run = BotRun(user_id=user_id, status='running')
+        db.session.add(run)
+    else:
+        checkpoints = {
+            query: item for query, item in run.get_items().items() if item.get('order_id') == run.order_id
+        }
+        run.items = json.dumps(checkpoints)
+        added = sum(1 for item in checkpoints.values() if item.get('status') == 'added')
+        logging.info(f"Resuming bot run {run.id} for user {user_id} ({added} items already added)")
+    run.order_id = order_id
+    run.status = 'running'
+    run.updated_at = now
+    db.session.commit()
+    return run
+
+
+def checkpoint_item(run, query, message, packs=1, url=None):
+    """Record one item's outcome from its result message; commits"""
+    run.set_item(
+        query,
+        status='added' if message.startswith('✅') else 'failed',
+        packs=packs,
+        url=url,
+        message=message,
+        order_id=run.order_id,
+    )
+    db.session.commit()
+
+
+def finish_run(run, results):
+    """Close the run once every item was attempted: 'done' if all were added, else 'failed'.
+
+    Pass ``results=None`` when the pass itself failed part-way; the run is then
+    'interrupted' and resumable. The caller commits.
+    """
+    if results is None:
+        run.status = 'interrupted'
+    else:
+        run.status = 'done' if all(message.startswith('✅') for message in results) else 'failed'
+    return run.status
@@ -0,0 +1,67 @@
+"""Per-user Blinkit login cookies.
+
+Cookies live as JSON in ``User.blinkit_cookies``; ``save_user_cookies`` is
+the only writer (the /cookies/save route). Each process keeps the parsed list
+in a dict and re-reads the row after ``COOKIE_CACHE_SECONDS``, so a bot
+session normally gets its cookies without touching the database. Each entry
+carries a fingerprint, which lets the bot skip re-injecting cookies a pooled
+browser already holds.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from threading import Lock
+
+from flask import current_app
+
+from app.models import db, User
+
+_cache = {}  # user_id -> (cookies, fingerprint, loaded_at)
+_lock = Lock()
+
+
+def _fingerprint(raw):
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def user_cookies(user_id):
+    """(cookies, fingerprint) for ``user_id``; ([], None) when none are saved"""
+    if not user_id:
+        return [], None
+    max_age = current_app.config.get('COOKIE_CACHE_SECONDS', 300)
+    entry = _cache.get(user_id)
+    if entry is None or time.monotonic() - entry[2] > max_age:
+        raw = db.session.query(User.blinkit_cookies).filter_by(id=user_id).scalar()
+        try:
+            cookies = json.loads(raw) if raw else []
+        except ValueError:
+            logging.warning(f"Ignoring unreadable saved cookies for user {user_id}")
+            cookies = []
+        entry = (cookies, _fingerprint(raw) if cookies else None, time.monotonic())
+        with _lock:
+            _cache[user_id] = entry
+    return entry[0], entry[1]
+
+
+def has_user_cookies(user_id):
+    return bool(user_cookies(user_id)[0])
+
+
+def save_user_cookies(user, cookies):
+    """Store ``cookies`` (as returned by ``driver.get_cookies()``) on ``user``; the caller commits"""
+    raw = json.dumps(cookies)
+    user.blinkit_cookies = raw
+    user.cookies_saved = bool(cookies)
+    with _lock:
+        _cache[user.id] = (cookies, _fingerprint(raw) if cookies else None, time.monotonic())
+
+
+def forget_cached_cookies(user_id=None):
+    """Drop this process's copy for one user (or everyone)"""
+    with _lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
@@ -0,0 +1,212 @@
+"""Background order jobs.
+
+Routes that drive Chrome (low-stock orders, grocery lists, product search)
+only enqueue an ``OrderJob`` and return its id; ``GET /jobs/<id>`` reports the
+status and per-step results. The scheduler leader claims queued jobs and runs
+them on its own worker pool (``ORDER_JOB_WORKERS``), so web workers stay free
+for page traffic.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from app.models import db, Order, OrderJob, Notification
+from app.ordering import filter_new_items, start_order, finish_order
+from app.bot_runs import start_run, finish_run, abandon_order
+
+
+def enqueue_job(user_id, kind, **params):
+    """Stage a queued job; the caller commits and then calls ``wake_scheduler()``"""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = OrderJob(user_id=user_id, kind=kind, status='queued', params=json.dumps(params))
+    db.session.add(job)
+    return job
+
+
+def queued_job_ids(limit):
+    """Oldest queued job ids, at most ``limit`` of them"""
+    rows = db.session.query(OrderJob.id).filter(
+        OrderJob.status == 'queued'
+    ).order_by(OrderJob.id).limit(limit)
+    return [job_id for (job_id,) in rows]
+
+
+def claim_job(job_id, holder):
+    """Move a queued job to running for ``holder``; False if someone else got it first"""
+    updated = OrderJob.query.filter_by(id=job_id, status='queued').update(
+        {'status': 'running', 'worker': holder, 'started_at': datetime.utcnow(), 'heartbeat_at': datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    return bool(updated)
+
+
+def fail_orphaned_jobs(holder, stale_seconds):
+    """Fail jobs another scheduler left running with no step for ``stale_seconds``.
+
+    A scheduler that only lost the lease briefly keeps running its jobs and
+    recording steps, so only jobs that have gone quiet count as orphaned. An
+    orphaned order's lines are settled too, so the dedup window doesn't hold
+    its items back.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_seconds)
+    orphans = OrderJob.query.filter(
+        OrderJob.status == 'running',
+        OrderJob.worker != holder,
+        func.coalesce(OrderJob.heartbeat_at, OrderJob.started_at) < cutoff,
+    ).all()
+    for job in orphans:
+        job.status = 'failed'
+        job.error = 'Interrupted: the worker running this job stopped'
+        job.finished_at = datetime.utcnow()
+        order_id = job.get_params().get('order_id')
+        if job.kind in ('order', 'grocery') and order_id:
+            order = db.session.get(Order, order_id)
+            if order is not None:
+                abandon_order(order)
+    db.session.commit()
+    if orphans:
+        logging.warning(f"Marked {len(orphans)} interrupted order jobs as failed")
+    return len(orphans)
+
+
+def run_job(job_id):
+    """Run a claimed job to completion, recording its steps, result or error"""
+    job = db.session.get(OrderJob, job_id)
+    if job is None:
+        return None
+
+    def progress(message):
+        job.add_step(message)
+        job.heartbeat_at = datetime.utcnow()
+        db.session.commit()
+
+    try:
+        result = JOB_HANDLERS[job.kind](job, job.get_params(), progress)
+        job.result = json.dumps(result)
+        job.status = 'done'
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Order job {job_id} ({job.kind}) failed: {e}")
+        job.status = 'failed'
+        job.error = str(e)[:500]
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job.status
+
+
+# Handlers -----------------------------------------------------------------
+
+def _run_order(job, params, progress):
+    """Fill the cart for a low-stock order staged by the /order route"""
+    from bot.green_shelf_bot import GreenShelfBot
+
+    order = db.session.get(Order, params['order_id'])
+    items = json.loads(order.items)
+    upi_id = params['upi_id']
+    item_results = None
+    messages = []
+    timings = []
+    # Checkpoints each item; picks up where an interrupted pass for this user stopped
+    run = start_run(job.user_id, order.id)
+    try:
+        bot = GreenShelfBot(
+            upi_id, user_id=job.user_id, headless=params.get('headless', False),
+            debug_tags={'job_id': job.id, 'order_id': order.id},
+        )
+        try:
+            item_results = bot.process_items(
+                items, keep_browser=params.get('checkout', False), progress=progress, run=run,
+            )
+            messages = list(item_results)
+            timings = bot.item_timings
+            if params.get('checkout'):
+                try:
+                    checkout_msgs = bot.proceed_to_checkout_and_select_upi(upi_id)
+                except Exception as e:
+                    checkout_msgs = [f"⚠️ Checkout step failed: {str(e)[:120]}"]
+                for message in checkout_msgs:
+                    progress(message)
+                messages.extend(checkout_msgs)
+        finally:
+            bot.cleanup()
+    except Exception:
+        db.session.rollback()
+        # Don't let a crashed run suppress these items for the whole window
+        finish_order(order, item_results)
+        finish_run(run, None)
+        db.session.commit()
+        raise
+
+    # Record which lines actually made it into the cart
+    finish_order(order, item_results)
+    finish_run(run, item_results)
+    db.session.add(Notification(
+        user_id=job.user_id,
+        title='Order Placed',
+        message=f'Order placed for {len(items)} items. Check your UPI app for payment.',
+        notification_type='order'
+    ))
+    db.session.commit()
+    return {'order_id': order.id, 'run_id': run.id, 'messages': messages, 'timings': timings}
+
+
+def _run_grocery(job, params, progress):
+    """Order a free-text grocery list through the direct product links.
+
+    The route staged a pending order for the list (one line per item, after
+    de-duplication); each line is settled from that item's own result.
+    """
+    from app.routes import run_grocery_ordering
+
+    if params.get('order_id'):
+        order = db.session.get(Order, params['order_id'])
+    else:
+        # Queued before grocery jobs staged their order
+        order = start_order(job.user_id, filter_new_items(job.user_id, params['items'])[0])
+        db.session.commit()
+    grocery_list = json.loads(order.items)
+    item_results = {}
+    try:
+        messages = run_grocery_ordering(
+            grocery_list, params.get('headless', False), params['upi_id'],
+            user_id=job.user_id, progress=progress, item_results=item_results,
+        )
+    except Exception:
+        db.session.rollback()
+        # Don't let a crashed run suppress these items for the whole window
+        finish_order(order, None)
+        db.session.commit()
+        raise
+
+    placed = finish_order(order, [item_results.get(item, '') for item in grocery_list])
+    if placed:
+        db.session.add(Notification(
+            user_id=job.user_id,
+            title='Grocery Order Placed',
+            message=f'Grocery order placed for {placed} of {len(grocery_list)} items. Check your UPI app for payment.',
+            notification_type='order'
+        ))
+    db.session.commit()
+    return {'order_id': order.id, 'status': order.status, 'messages': messages}
+
+
+def _run_search(job, params, progress):
+    """Search Blinkit for products matching ``params['query']``"""
+    from bot.green_shelf_bot import GreenShelfBot
+
+    bot = GreenShelfBot(params.get('upi_id', ''), user_id=job.user_id, debug_tags={'job_id': job.id})
+    products = bot.search_products(params['query'])
+    progress(f"Found {len(products)} products for '{params['query']}'")
+    return {'products': products}
+
+
+JOB_HANDLERS = {
+    'order': _run_order,
+    'grocery': _run_grocery,
+    'search': _run_search,
+}
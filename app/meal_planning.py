@@ -4,6 +4,8 @@ from flask_wtf import FlaskForm
 from wtforms import DateField, SelectField, IntegerField, SubmitField, StringField
 from wtforms.validators import DataRequired, NumberRange
 from app.models import db, MealPlan, Recipe, InventoryItem
+from app.reorder import record_quantity_changes
+from app.scheduler import wake_scheduler
 from datetime import datetime, date, timedelta
 import json
 
@@ -134,6 +136,7 @@ def cook_meal(id):
     
     try:
         # Update inventory based on recipe ingredients
+        changes = []
         ingredients = meal_plan.recipe.get_ingredients()
         for ingredient_line in ingredients:
             # Simple parsing - assumes format like "1 cup rice" or "2 tbsp oil"
@@ -155,6 +158,7 @@ def cook_meal(id):
                     
                     if inventory_item:
                         # Reduce quantity
+                        changes.append((inventory_item, inventory_item.quantity))
                         new_quantity = max(0, inventory_item.quantity - adjusted_quantity)
                         inventory_item.quantity = new_quantity
                         
@@ -164,7 +168,10 @@ def cook_meal(id):
         
         # Mark meal as cooked
         meal_plan.is_cooked = True
+        reorders_queued = record_quantity_changes(changes)
         db.session.commit()
+        if reorders_queued:
+            wake_scheduler()
         
         flash(f'Meal "{meal_plan.recipe.name if meal_plan.recipe else meal_plan.custom_meal_name}" marked as cooked! Inventory updated.', 'success')
         
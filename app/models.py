@@ -1,5 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import func, text
+from sqlalchemy.ext.hybrid import hybrid_method
+from collections import namedtuple
 from datetime import datetime, date
 from werkzeug.security import generate_password_hash, check_password_hash
 import json
@@ -78,6 +81,16 @@ class User(UserMixin, db.Model):
         self.delivery_time_slots = json.dumps(slots)
 
 class InventoryItem(db.Model):
+    __table_args__ = (
+        # Backs low_stock_rows(); partial where the backend supports it so the
+        # index only holds items that are actually below threshold
+        db.Index(
+            'ix_inventory_item_low_stock', 'user_id', 'quantity', 'threshold',
+            sqlite_where=text('quantity < threshold'),
+            postgresql_where=text('quantity < threshold'),
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
@@ -90,9 +103,37 @@ class InventoryItem(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    @hybrid_method
     def is_low_stock(self):
+        # Works on instances and as a SQL expression: query.filter(InventoryItem.is_low_stock())
         return self.quantity < self.threshold
 
+LowStockRow = namedtuple('LowStockRow', ['user_id', 'item_id', 'needed', 'unit', 'query', 'name'])
+
+def low_stock_rows(user_id=None, user_ids=None, auto_order_only=False):
+    """Return a LowStockRow for every item below its threshold in one query.
+
+    user_id / user_ids: restrict to one user or a batch of users (default: all users)
+    auto_order_only: only include users with auto-ordering enabled
+    """
+    query = db.session.query(
+        InventoryItem.user_id,
+        InventoryItem.id,
+        InventoryItem.threshold - InventoryItem.quantity,
+        InventoryItem.unit,
+        func.coalesce(func.nullif(InventoryItem.blinkit_query, ''), InventoryItem.name),
+        InventoryItem.name,
+    ).filter(InventoryItem.is_low_stock())
+
+    if user_id is not None:
+        query = query.filter(InventoryItem.user_id == user_id)
+    if user_ids is not None:
+        query = query.filter(InventoryItem.user_id.in_(list(user_ids)))
+    if auto_order_only:
+        query = query.join(User, User.id == InventoryItem.user_id).filter(User.auto_order_enabled.is_(True))
+
+    return [LowStockRow(*row) for row in query.order_by(InventoryItem.user_id, InventoryItem.id)]
+
 class Recipe(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -162,6 +203,22 @@ class Order(db.Model):
     def set_items(self, items):
         self.items = json.dumps(items)
 
+class OrderLine(db.Model):
+    """One item of an order, tracked so the same query isn't re-ordered while in flight"""
+    __table_args__ = (
+        db.Index('ix_order_line_user_query_created', 'user_id', 'blinkit_query', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'))
+    blinkit_query = db.Column(db.String(200), nullable=False)
+    status = db.Column(db.String(20), default='pending')  # 'pending', 'placed', 'failed'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    order = db.relationship('Order', backref=db.backref('lines', lazy=True, order_by='OrderLine.id', cascade='all, delete-orphan'))
+
 class Receipt(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -184,6 +241,125 @@ class Receipt(db.Model):
     def set_parsed_items(self, items):
         self.parsed_items = json.dumps(items)
 
+class AutoOrderSchedule(db.Model):
+    """Per-user auto-order timing kept by the scheduler.
+
+    ``changed_at`` is bumped whenever a user's auto-order preferences change so the
+    scheduler can re-read only those users instead of rescanning everyone.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    last_run_at = db.Column(db.DateTime)
+    next_due_at = db.Column(db.DateTime)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class ReorderEvent(db.Model):
+    """An inventory item that just dropped below its threshold, waiting for the order worker"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('inventory_item.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, index=True)  # NULL while pending
+
+class SchedulerLease(db.Model):
+    """Leader-election lease so only one scheduler runs across processes and hosts"""
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(200))
+    expires_at = db.Column(db.DateTime)
+
+class ProductLink(db.Model):
+    """Curated direct link to a Blinkit product page (see app/product_links.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    name_key = db.Column(db.String(200), unique=True, nullable=False)  # normalize_query(name)
+    name = db.Column(db.String(200), nullable=False)
+    url = db.Column(db.String(500), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ProductUrlCache(db.Model):
+    """Product page a ``blinkit_query`` resolved to, per delivery pincode.
+
+    Lets the bot open the product page directly instead of searching; see
+    app/product_urls.py for the TTL and invalidation rules.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    blinkit_query = db.Column(db.String(200), nullable=False)  # normalized, see normalize_query()
+    pincode = db.Column(db.String(10), nullable=False, default='')
+    url = db.Column(db.String(500), nullable=False)
+    hits = db.Column(db.Integer, default=0)
+    resolved_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('blinkit_query', 'pincode', name='uq_product_url_cache_query_pincode'),
+    )
+
+class OrderJob(db.Model):
+    """A queued browser task (order, grocery list, product search) run off the request thread.
+
+    Web routes only insert the row; the scheduler's job workers claim it, run the
+    Selenium work and append one entry to ``steps`` per finished step.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # 'order', 'grocery', 'search'
+    status = db.Column(db.String(20), default='queued', index=True)  # 'queued', 'running', 'done', 'failed'
+    params = db.Column(db.Text)  # JSON string
+    steps = db.Column(db.Text)  # JSON list of per-step messages
+    result = db.Column(db.Text)  # JSON string
+    error = db.Column(db.Text)
+    worker = db.Column(db.String(200))  # scheduler holder that claimed the job
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # bumped with every step; see fail_orphaned_jobs()
+    finished_at = db.Column(db.DateTime)
+
+    def get_params(self):
+        return json.loads(self.params) if self.params else {}
+
+    def get_steps(self):
+        return json.loads(self.steps) if self.steps else []
+
+    def add_step(self, message):
+        self.steps = json.dumps(self.get_steps() + [message])
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'steps': self.get_steps(),
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+class BotRun(db.Model):
+    """Per-item checkpoints of one bot pass over an order's items.
+
+    A pass that dies mid-way (Chrome crash, hung WebDriver call) leaves its
+    row unfinished; the next pass for the user resumes it and skips items
+    already added (see app/bot_runs.py).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'))  # latest order that used this run
+    status = db.Column(db.String(20), default='running')  # 'running', 'interrupted', 'done', 'failed'
+    items = db.Column(db.Text)  # JSON {query: {"status", "packs", "url", "message", "order_id"}}
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_bot_run_user_status_updated', 'user_id', 'status', 'updated_at'),
+    )
+
+    def get_items(self):
+        return json.loads(self.items) if self.items else {}
+
+    def set_item(self, query, **checkpoint):
+        items = self.get_items()
+        items[query] = checkpoint
+        self.items = json.dumps(items)
+
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -0,0 +1,89 @@
+"""Order de-duplication.
+
+Every auto/low-stock order records one OrderLine per ``blinkit_query``. Before
+ordering again, queries with a pending or placed line inside the
+``REORDER_DEDUP_MINUTES`` window are dropped, so an item that stays below its
+threshold until delivery isn't re-added to the cart on every pass.
+
+Order items are either plain queries or ``order_item()`` dicts, which also
+carry the low-stock shortfall so the bot can add enough packs in one go.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.models import db, Order, OrderLine
+
+IN_FLIGHT_STATUSES = ('pending', 'placed')
+
+
+def order_item(query, needed=None, unit=None):
+    """A JSON-friendly order item: the query plus how much of it is missing"""
+    return {'query': query, 'needed': needed, 'unit': unit}
+
+
+def item_query(item):
+    """The Blinkit query of a plain-query or ``order_item()`` item"""
+    return item['query'] if isinstance(item, dict) else item
+
+
+def in_flight_queries(user_id, queries, window_minutes=None):
+    """Return the subset of ``queries`` already pending/placed within the window (one query)"""
+    queries = list(dict.fromkeys(queries))
+    if not queries:
+        return set()
+    if window_minutes is None:
+        window_minutes = current_app.config.get('REORDER_DEDUP_MINUTES', 720)
+    cutoff = datetime.utcnow() - timedelta(minutes=window_minutes)
+    rows = db.session.query(OrderLine.blinkit_query).filter(
+        OrderLine.user_id == user_id,
+        OrderLine.blinkit_query.in_(queries),
+        OrderLine.created_at >= cutoff,
+        OrderLine.status.in_(IN_FLIGHT_STATUSES),
+    ).distinct()
+    return {query for (query,) in rows}
+
+
+def filter_new_items(user_id, items, window_minutes=None):
+    """Split ``items`` into (new, suppressed), preserving order; one item per query"""
+    by_query = {}
+    for item in items:
+        by_query.setdefault(item_query(item), item)
+    unique = list(by_query.values())
+    seen = in_flight_queries(user_id, [item_query(item) for item in unique], window_minutes)
+    new = [item for item in unique if item_query(item) not in seen]
+    suppressed = [item for item in unique if item_query(item) in seen]
+    return new, suppressed
+
+
+def start_order(user_id, items):
+    """Stage a pending Order with one in-flight line per item; the caller commits"""
+    order = Order(
+        user_id=user_id,
+        items=json.dumps(items),
+        status='pending',
+        delivery_date=datetime.now().date()
+    )
+    db.session.add(order)
+    for item in items:
+        order.lines.append(OrderLine(user_id=user_id, blinkit_query=item_query(item), status='pending'))
+    return order
+
+
+def finish_order(order, results):
+    """Mark each line placed/failed from the bot's per-item results.
+
+    ``results`` are GreenShelfBot.process_items messages, one per item in the
+    order the items were passed; failed lines stop counting as in flight.
+    Pass ``results=None`` when the whole run failed.
+    """
+    results = results or []
+    placed = 0
+    for index, line in enumerate(order.lines):
+        ok = index < len(results) and results[index].startswith('✅')
+        line.status = 'placed' if ok else 'failed'
+        placed += ok
+    order.status = 'placed' if placed else 'failed'
+    return placed
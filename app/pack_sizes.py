@@ -0,0 +1,62 @@
+"""How many packs cover a low-stock shortfall.
+
+Low-stock rows say how much is missing (``needed`` in the item's ``unit``);
+Blinkit sells packs. The pack size comes from the query when it names one,
+otherwise from the catalog entry the store pages use for exactly that name
+(``app/static/products.json``, e.g. ``"size": "500 ml"``), so 3 L of a 500 ml
+milk is 6 packs. A loose query ("milk") says nothing about the size of the
+search result the bot will add, so it gets one pack, as do sizes in a
+different kind of unit (grams vs litres). Counted units (``pcs``) with no
+counted pack size are taken as a number of packs.
+"""
+
+import json
+import logging
+import math
+from functools import lru_cache
+from pathlib import Path
+
+from flask import current_app
+
+from app.product_urls import normalize_query
+from bot.units import parse_amount, parse_size
+
+CATALOG_FILE = Path(__file__).resolve().parent / "static" / "products.json"
+
+@lru_cache(maxsize=1)
+def _catalog():
+    """{normalized name: parsed size} from products.json, read once per process"""
+    try:
+        with open(CATALOG_FILE, "r", encoding="utf-8") as f:
+            products = json.load(f)
+    except Exception as e:
+        logging.warning(f"Product catalog unavailable for pack sizes: {e}")
+        return {}
+    sizes = {}
+    for p in products:
+        if p.get("name"):
+            sizes.setdefault(normalize_query(p["name"]), parse_size(p.get("size")))
+    return sizes
+
+
+def exact_pack_size(query):
+    """Pack size ``query`` pins down: one it states, or its exact catalog entry's; else None"""
+    return parse_size(query) or _catalog().get(normalize_query(query))
+
+
+def packs_needed(query, needed, unit, max_packs=None):
+    """Packs of ``query`` that cover ``needed`` ``unit`` (at least 1, at most MAX_PACKS_PER_ITEM)"""
+    if max_packs is None:
+        max_packs = current_app.config.get('MAX_PACKS_PER_ITEM', 10)
+    shortfall = parse_amount(needed, unit)
+    if not shortfall or shortfall[1] <= 0:
+        return 1
+    size = exact_pack_size(query)
+    if size and size[0] == shortfall[0] and size[1] > 0:
+        # Round first so 3 L / 500 ml doesn't become 6.000000001 -> 7
+        packs = math.ceil(round(shortfall[1] / size[1], 6))
+    elif shortfall[0] == "count":
+        packs = math.ceil(round(shortfall[1], 6))
+    else:
+        return 1
+    return max(1, min(packs, max_packs))
@@ -0,0 +1,109 @@
+"""Catalog of direct Blinkit product links.
+
+``ProductLink`` rows are keyed on ``normalize_query(name)``, so "Gokul Full
+Cream Milk" and "gokul  full cream milk" are the same entry. The catalog is
+small: each process loads it into a dict on first use and re-reads it every
+``PRODUCT_LINK_RELOAD_SECONDS`` to pick up imports made elsewhere, so a lookup
+is a single dict access. Bulk-load it with ``python import_product_links.py``.
+"""
+
+import json
+import logging
+import time
+from pathlib import Path
+from threading import Lock
+
+from flask import current_app
+
+from app.models import db, ProductLink
+from app.product_urls import normalize_query
+
+SEED_FILE = Path(__file__).resolve().parents[1] / "data" / "product_links.json"
+
+_links = None
+_loaded_at = 0.0
+_lock = Lock()
+
+
+def _catalog():
+    global _links, _loaded_at
+    max_age = current_app.config.get('PRODUCT_LINK_RELOAD_SECONDS', 300)
+    if _links is None or time.monotonic() - _loaded_at > max_age:
+        with _lock:
+            if _links is None or time.monotonic() - _loaded_at > max_age:
+                _links = dict(db.session.query(ProductLink.name_key, ProductLink.url).all())
+                _loaded_at = time.monotonic()
+    return _links
+
+
+def reload_product_links():
+    """Drop this process's copy so the next lookup re-reads the table"""
+    global _links
+    with _lock:
+        _links = None
+
+
+def find_product_link(name):
+    """Direct product URL for ``name``, or None"""
+    return _catalog().get(normalize_query(name))
+
+
+def find_product_links(names):
+    """{name: url} for the names the catalog knows"""
+    catalog = _catalog()
+    found = {}
+    for name in names:
+        url = catalog.get(normalize_query(name))
+        if url:
+            found[name] = url
+    return found
+
+
+def import_product_links(entries, replace=False):
+    """Upsert catalog entries; returns (added, updated, removed).
+
+    entries: {name: url} or a list of {"name": ..., "url": ...} dicts.
+    replace: delete entries that aren't in ``entries``.
+    """
+    if isinstance(entries, dict):
+        entries = [{'name': name, 'url': url} for name, url in entries.items()]
+    incoming = {}
+    for entry in entries:
+        key = normalize_query(entry.get('name'))
+        url = (entry.get('url') or '').strip()
+        if key and url:
+            incoming[key] = (entry['name'].strip(), url)
+
+    existing = {row.name_key: row for row in ProductLink.query.all()}
+    added = updated = removed = 0
+    for key, (name, url) in incoming.items():
+        row = existing.get(key)
+        if row is None:
+            db.session.add(ProductLink(name_key=key, name=name, url=url))
+            added += 1
+        elif row.url != url or row.name != name:
+            row.name, row.url = name, url
+            updated += 1
+    if replace:
+        for key, row in existing.items():
+            if key not in incoming:
+                db.session.delete(row)
+                removed += 1
+    db.session.commit()
+    reload_product_links()
+    return added, updated, removed
+
+
+def seed_product_links(path=SEED_FILE):
+    """Load ``path`` into the catalog if the catalog is still empty"""
+    if ProductLink.query.first() is not None or not Path(path).exists():
+        return 0
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            added, _, _ = import_product_links(json.load(f))
+    except Exception as e:
+        db.session.rollback()
+        logging.warning(f"Could not seed product links from {path}: {e}")
+        return 0
+    logging.info(f"Seeded {added} product links from {path}")
+    return added
@@ -0,0 +1,63 @@
+"""Search query -> product page cache for the bot.
+
+When a search for a ``blinkit_query`` ends in an ADD click, the product page of
+that result is recorded per pincode (catalogues differ between dark stores).
+Later orders open the page directly and skip the search round-trip. Entries
+expire after ``PRODUCT_URL_TTL_HOURS``, are refreshed on every successful
+direct add and are dropped as soon as a direct add fails.
+"""
+
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, ProductUrlCache
+
+
+def normalize_query(query):
+    return " ".join((query or "").lower().split())
+
+
+def cached_product_urls(queries, pincode):
+    """{query: url} for the queries with a fresh cache entry (one query)"""
+    by_key = {}
+    for query in queries:
+        by_key.setdefault(normalize_query(query), []).append(query)
+    if not by_key:
+        return {}
+    ttl = current_app.config.get('PRODUCT_URL_TTL_HOURS', 168)
+    cutoff = datetime.utcnow() - timedelta(hours=ttl)
+    rows = ProductUrlCache.query.filter(
+        ProductUrlCache.blinkit_query.in_(list(by_key)),
+        ProductUrlCache.pincode == (pincode or ''),
+        ProductUrlCache.resolved_at >= cutoff,
+    ).all()
+    return {query: row.url for row in rows for query in by_key[row.blinkit_query]}
+
+
+def remember_product_url(query, pincode, url):
+    """Record (or re-validate) the product page ``query`` resolved to"""
+    key = normalize_query(query)
+    row = ProductUrlCache.query.filter_by(blinkit_query=key, pincode=pincode or '').first()
+    if row is None:
+        row = ProductUrlCache(blinkit_query=key, pincode=pincode or '', url=url, hits=0)
+        db.session.add(row)
+    elif row.url == url:
+        row.hits = (row.hits or 0) + 1
+    else:
+        row.url, row.hits = url, 0
+    row.resolved_at = datetime.utcnow()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker recorded the same query first
+        db.session.rollback()
+
+
+def forget_product_url(query, pincode):
+    """Drop a mapping whose product page no longer works"""
+    ProductUrlCache.query.filter_by(
+        blinkit_query=normalize_query(query), pincode=pincode or ''
+    ).delete(synchronize_session=False)
+    db.session.commit()
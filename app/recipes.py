@@ -4,6 +4,8 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, IntegerField, SelectField, SubmitField, BooleanField
 from wtforms.validators import DataRequired, Length, NumberRange
 from app.models import db, Recipe, InventoryItem
+from app.reorder import record_quantity_changes
+from app.scheduler import wake_scheduler
 import json
 import google.generativeai as genai
 from config import Config
@@ -281,6 +283,7 @@ def cook_recipe(id):
     
     try:
         # Parse ingredients and update inventory
+        changes = []
         ingredients = recipe.get_ingredients()
         for ingredient_line in ingredients:
             # Simple parsing - assumes format like "1 cup rice" or "2 tbsp oil"
@@ -299,6 +302,7 @@ def cook_recipe(id):
                     
                     if inventory_item:
                         # Reduce quantity
+                        changes.append((inventory_item, inventory_item.quantity))
                         new_quantity = max(0, inventory_item.quantity - quantity)
                         inventory_item.quantity = new_quantity
                         
@@ -306,7 +310,10 @@ def cook_recipe(id):
                     # Skip if quantity can't be parsed
                     continue
         
+        reorders_queued = record_quantity_changes(changes)
         db.session.commit()
+        if reorders_queued:
+            wake_scheduler()
         flash(f'Recipe "{recipe.name}" marked as cooked! Inventory updated.', 'success')
         
     except Exception as e:
@@ -0,0 +1,42 @@
+"""Event-driven reorder triggering.
+
+Anything that lowers an inventory quantity reports the change here. When an
+item crosses from at/above its threshold to below it, a ReorderEvent is
+staged on the session; the scheduler consumes pending events on its next
+tick (immediately when it runs in the same process) instead of waiting for
+the user's polling interval to come around.
+"""
+
+from app.models import db, ReorderEvent
+
+
+def crossed_threshold(item, previous_quantity):
+    """True if this change took ``item`` from at/above its threshold to below it"""
+    if previous_quantity is None or item.quantity is None or item.threshold is None:
+        return False
+    return previous_quantity >= item.threshold and item.quantity < item.threshold
+
+
+def record_quantity_change(item, previous_quantity):
+    """Stage a reorder event if ``item`` just went low; returns True if one was queued.
+
+    The caller commits the session and then calls ``app.scheduler.wake_scheduler()``.
+    """
+    if not crossed_threshold(item, previous_quantity):
+        return False
+    if not item.user.auto_order_enabled:
+        return False
+    db.session.add(ReorderEvent(user_id=item.user_id, item_id=item.id))
+    return True
+
+
+def record_quantity_changes(changes):
+    """Bulk form of record_quantity_change for ``(item, previous_quantity)`` pairs.
+
+    An item changed several times only counts its first previous quantity, so it
+    yields at most one event. Returns the number of events queued.
+    """
+    earliest = {}
+    for item, previous in changes:
+        earliest.setdefault(id(item), (item, previous))
+    return sum(1 for item, previous in earliest.values() if record_quantity_change(item, previous))
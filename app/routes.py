@@ -1,81 +1,26 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
-from bot.green_shelf_bot import GreenShelfBot
-from app.models import db, InventoryItem, Order, Notification
-import os
-import json
-import pickle
+from app.models import db, InventoryItem, OrderJob, Notification, low_stock_rows
+from app.reorder import record_quantity_change
+from app.ordering import filter_new_items, start_order, order_item
+from app.pack_sizes import packs_needed, exact_pack_size
+from app.bot_runs import recover_dead_runs
+from app.jobs import enqueue_job
+from app.product_links import find_product_link
+from app.cookie_store import user_cookies, has_user_cookies, save_user_cookies
+from app.scheduler import wake_scheduler
 import time
 import logging
-from datetime import datetime
 from flask_wtf.csrf import validate_csrf, CSRFError
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-try:
-    from webdriver_manager.chrome import ChromeDriverManager
-    WEBDRIVER_MANAGER_AVAILABLE = True
-except ImportError:
-    WEBDRIVER_MANAGER_AVAILABLE = False
+from bot.drivers import create_chrome_driver, driver_pool, inject_cookies
+from bot.selector_registry import find_element, find_first
+from bot.parallel_cart import run_parallel, borrow_sessions, read_cart_lines, reconcile_cart
+from bot.cart_state import read_cart, cart_delta
+from config import Config
 
 main = Blueprint("main", __name__)
 
 
-def create_chrome_driver(custom_options=None, headless=False):
-    """Helper function to create Chrome driver with enhanced error handling"""
-    options = Options()
-    
-    # Reasonable Chrome options for reliability
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-notifications")
-    options.add_argument("--disable-popup-blocking")
-    options.add_argument("--window-size=1280,900")
-    options.add_argument("--log-level=3")
-    options.add_experimental_option('excludeSwitches', ['enable-logging'])
-    options.add_experimental_option('useAutomationExtension', False)
-    options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    
-    # Add custom options if provided
-    if custom_options:
-        for arg in custom_options:
-            options.add_argument(arg)
-    
-    # Headless mode
-    if headless:
-        options.add_argument("--headless=new")
-        options.add_argument("--disable-software-rasterizer")
-    
-    try:
-        if WEBDRIVER_MANAGER_AVAILABLE:
-            service = Service(ChromeDriverManager().install())
-            return webdriver.Chrome(service=service, options=options)
-        else:
-            return webdriver.Chrome(options=options)
-    except Exception as e:
-        logging.error(f"Failed to create Chrome driver: {e}")
-        # Fallback with minimal options
-        fallback_options = Options()
-        fallback_options.add_argument("--no-sandbox")
-        fallback_options.add_argument("--disable-dev-shm-usage")
-        if headless:
-            fallback_options.add_argument("--headless=new")
-        if custom_options:
-            for arg in custom_options:
-                fallback_options.add_argument(arg)
-        
-        try:
-            if WEBDRIVER_MANAGER_AVAILABLE:
-                service = Service(ChromeDriverManager().install())
-                return webdriver.Chrome(service=service, options=fallback_options)
-            else:
-                return webdriver.Chrome(options=fallback_options)
-        except Exception as e2:
-            logging.error(f"Failed to create fallback Chrome driver: {e2}")
-            raise e2
-
 @main.route("/")
 def index():
     if not current_user.is_authenticated:
@@ -83,7 +28,10 @@ def index():
     
     # Get user's inventory
     inventory_items = InventoryItem.query.filter_by(user_id=current_user.id).all()
-    low_items = [item for item in inventory_items if item.is_low_stock()]
+    low_items = InventoryItem.query.filter(
+        InventoryItem.user_id == current_user.id,
+        InventoryItem.is_low_stock()
+    ).all()
     
     # Get recent notifications
     notifications = Notification.query.filter_by(
@@ -131,13 +79,16 @@ def add_or_update_item():
         name=name
     ).first()
     
+    reorder_queued = False
     if existing_item:
         # Update existing item
+        previous_quantity = existing_item.quantity
         existing_item.quantity = quantity_val
         existing_item.threshold = threshold_val
         existing_item.unit = unit
         existing_item.blinkit_query = query
         existing_item.category = category
+        reorder_queued = record_quantity_change(existing_item, previous_quantity)
     else:
         # Create new item
         new_item = InventoryItem(
@@ -152,6 +103,8 @@ def add_or_update_item():
         db.session.add(new_item)
     
     db.session.commit()
+    if reorder_queued:
+        wake_scheduler()
     flash("Item saved", "success")
     return redirect(url_for("main.index"))
 
@@ -203,9 +156,13 @@ def adjust_item_quantity():
         flash("Item not found", "error")
         return redirect(url_for("main.index"))
 
+    previous_quantity = item.quantity
     new_qty = max(item.quantity + delta_val, 0)
     item.quantity = new_qty
+    reorder_queued = record_quantity_change(item, previous_quantity)
     db.session.commit()
+    if reorder_queued:
+        wake_scheduler()
     flash("Quantity updated", "success")
     return redirect(url_for("main.index"))
 
@@ -245,17 +202,14 @@ def adjust_item_threshold():
 @main.route("/check-low")
 @login_required
 def check_low():
-    low_items = InventoryItem.query.filter_by(user_id=current_user.id).all()
-    low = []
-    for item in low_items:
-        if item.is_low_stock():
-            low.append({
-                "id": item.id,
-                "name": item.name,
-                "needed": max(item.threshold - item.quantity, 0),
-                "unit": item.unit,
-                "query": item.blinkit_query or item.name,
-            })
+    low = [{
+        "id": row.item_id,
+        "name": row.name,
+        "needed": row.needed,
+        "unit": row.unit,
+        "query": row.query,
+        "packs": packs_needed(row.query, row.needed, row.unit),
+    } for row in low_stock_rows(user_id=current_user.id)]
     return jsonify({"low_items": low})
 
 
@@ -269,56 +223,37 @@ def order_low_items():
         flash("UPI is required to proceed", "error")
         return redirect(url_for("main.index"))
 
-    # Get low stock items
-    low_items = InventoryItem.query.filter_by(user_id=current_user.id).all()
-    to_order = []
-    for item in low_items:
-        if item.is_low_stock():
-            to_order.append(item.blinkit_query or item.name)
+    # Get low stock items, with how much of each is missing
+    low_items = [order_item(row.query, row.needed, row.unit) for row in low_stock_rows(user_id=current_user.id)]
 
-    if not to_order:
+    if not low_items:
         flash("No items below threshold", "info")
         return redirect(url_for("main.index"))
 
-    try:
-        # Use headless flag to control Selenium headless operation
-        headless_flag = request.form.get('headless') == '1' or request.form.get('headless') == 'on'
-        bot = GreenShelfBot(upi_id, user_id=current_user.id, headless=headless_flag)
-        result = bot.process_items(to_order)
-        
-        if do_checkout:
-            try:
-                # Attempt checkout and UPI flow
-                checkout_msgs = bot.proceed_to_checkout_and_select_upi(upi_id)
-                result.extend(checkout_msgs)
-            except Exception as e:
-                result.append(f"⚠️ Checkout step failed: {str(e)[:120]}")
-        
-        # Create order record
-        order = Order(
-            user_id=current_user.id,
-            items=json.dumps(to_order),
-            status='placed',
-            delivery_date=datetime.now().date()
-        )
-        db.session.add(order)
-        db.session.commit()
-        
-        # Create notification
-        notification = Notification(
-            user_id=current_user.id,
-            title='Order Placed',
-            message=f'Order placed for {len(to_order)} items. Check your UPI app for payment.',
-            notification_type='order'
-        )
-        db.session.add(notification)
-        db.session.commit()
-        
-        flash("; ".join(result), "info")
-        
-    except Exception as e:
-        flash(f"Order failed: {str(e)}", "error")
-    
+    # Skip items that are already pending/placed within the dedup window, once
+    # any pass that died has had its pending lines settled
+    recover_dead_runs(current_user.id)
+    to_order, suppressed = filter_new_items(current_user.id, low_items)
+    if not to_order:
+        flash(f"All {len(suppressed)} low items were ordered recently; waiting for delivery", "info")
+        return redirect(url_for("main.index"))
+
+    # Use headless flag to control Selenium headless operation
+    headless_flag = request.form.get('headless') == '1' or request.form.get('headless') == 'on'
+    # The order lines are pending from here on, so the scheduler won't add them twice
+    order = start_order(current_user.id, to_order)
+    db.session.flush()
+    job = enqueue_job(
+        current_user.id, 'order',
+        order_id=order.id, upi_id=upi_id, checkout=do_checkout, headless=headless_flag,
+    )
+    db.session.commit()
+    wake_scheduler()
+
+    message = f"Ordering {len(to_order)} items in the background (job #{job.id}, status at {url_for('main.job_status', job_id=job.id)})"
+    if suppressed:
+        message += f"; skipped {len(suppressed)} items already ordered recently"
+    flash(message, "info")
     return redirect(url_for("main.index"))
 
 
@@ -355,12 +290,21 @@ def products_search():
     if not query:
         return jsonify({"error": "Missing query"}), 400
 
-    try:
-        bot = GreenShelfBot(current_user.upi_id or "", user_id=current_user.id)
-        products = bot.search_products(query)
-        return jsonify({"products": products})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    job = enqueue_job(current_user.id, 'search', query=query, upi_id=current_user.upi_id or "")
+    db.session.commit()
+    wake_scheduler()
+    status_url = url_for('main.job_status', job_id=job.id)
+    return jsonify({"job_id": job.id, "status_url": status_url}), 202, {'Location': status_url}
+
+
+@main.route("/jobs/<int:job_id>")
+@login_required
+def job_status(job_id):
+    """Status and per-step results of a background order/search job"""
+    job = OrderJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
 
 
 @main.route("/cookies/save", methods=["GET", "POST"])
@@ -395,19 +339,9 @@ def save_cookies():
         # Wait for user to complete login
         time.sleep(60)
         
-        # Save cookies to user-specific file (also save as generic cookies.pkl for compatibility)
-        cookies_file = f"cookies_{current_user.id}.pkl"
-        with open(cookies_file, "wb") as file:
-            pickle.dump(driver.get_cookies(), file)
-        
-        # Also save as generic cookies.pkl for compatibility with original app.py
-        with open("cookies.pkl", "wb") as file:
-            pickle.dump(driver.get_cookies(), file)
-        
+        # Store the login on the user's row (also marks cookies_saved)
+        save_user_cookies(current_user, driver.get_cookies())
         driver.quit()
-        
-        # Update user profile to indicate cookies are saved
-        current_user.cookies_saved = True
         db.session.commit()
         
         # Create success notification
@@ -451,35 +385,32 @@ def grocery_order():
         grocery_list = [item.strip().lower() for item in grocery_text.split('\n') if item.strip()]
         
         # Check if cookies are saved
-        cookies_file = f"cookies_{current_user.id}.pkl"
-        if not os.path.exists(cookies_file):
+        if not has_user_cookies(current_user.id):
             flash("Please save your Blinkit cookies first by going to Cookie Management", "error")
             return redirect(url_for("main.grocery_order"))
         
-        # Run the ordering process with UPI ID
-        result = run_grocery_ordering(grocery_list, headless_mode, cookies_file, upi_id)
-        
-        # Create order record
-        order = Order(
-            user_id=current_user.id,
-            items=json.dumps(grocery_list),
-            status='placed',
-            delivery_date=datetime.now().date()
-        )
-        db.session.add(order)
-        db.session.commit()
-        
-        # Create notification
-        notification = Notification(
-            user_id=current_user.id,
-            title='Grocery Order Placed',
-            message=f'Grocery order placed for {len(grocery_list)} items. Check your UPI app for payment.',
-            notification_type='order'
+        # Skip items already pending/placed within the dedup window, as /order does
+        recover_dead_runs(current_user.id)
+        to_order, suppressed = filter_new_items(current_user.id, grocery_list)
+        if not to_order:
+            flash(f"All {len(suppressed)} grocery items were ordered recently; waiting for delivery", "info")
+            return redirect(url_for("main.grocery_order"))
+
+        # The order lines are pending from here on, so nothing else orders them twice
+        order = start_order(current_user.id, to_order)
+        db.session.flush()
+        # Run the ordering process with UPI ID on the job workers
+        job = enqueue_job(
+            current_user.id, 'grocery',
+            order_id=order.id, upi_id=upi_id, headless=headless_mode,
         )
-        db.session.add(notification)
         db.session.commit()
+        wake_scheduler()
         
-        flash(f"Grocery order processing completed: {'; '.join(result)}", "info")
+        message = f"Ordering {len(to_order)} grocery items in the background (job #{job.id}, status at {url_for('main.job_status', job_id=job.id)})"
+        if suppressed:
+            message += f"; skipped {len(suppressed)} items already ordered recently"
+        flash(message, "info")
         return redirect(url_for("main.index"))
         
     except Exception as e:
@@ -487,208 +418,192 @@ def grocery_order():
         return redirect(url_for("main.grocery_order"))
 
 
-def run_grocery_ordering(grocery_list, headless_mode, cookies_file, upi_id):
-    """Execute the grocery ordering process using saved cookies - matches original app.py"""
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    
-    # Product-specific URLs (exact copy from original app.py)
-    PRODUCT_LINKS = {
-        "amul milk 500ml": "https://blinkit.com/prn/amul-taaza-toned-milk/prid/19512",
-        "gokul full cream milk": "https://blinkit.com/prn/gokul-full-cream-milk/prid/242693",
-        "english oven sandwich white bread": "https://blinkit.com/prn/english-oven-sandwich-white-bread/prid/18403",
-        "amul gold full cream milk": "https://blinkit.com/prn/amul-gold-full-cream-milk/prid/12872",
-        "amul cow milk": "https://blinkit.com/prn/amul-cow-milk/prid/160704",
-        "Gokul Satvik Pasteurized Cow Milk": "https://blinkit.com/prn/gokul-satvik-pasteurized-cow-milk/prid/499615",
-        "Amul Taaza Homogenised Toned Milk": "https://blinkit.com/prn/amul-taaza-homogenised-toned-milk/prid/176",
-        "Amul Moti Toned Milk": "https://blinkit.com/prn/amul-moti-toned-milk-90-days-shelf-life/prid/34778",
-        "Mother Dairy Cow Milk": "https://blinkit.com/prn/mother-dairy-cow-milk/prid/339309",
-        "Amul Gold Milk": "https://blinkit.com/prn/amul-gold-milk/prid/179",
-        "Amul Lactose Free Milk": "https://blinkit.com/prn/amul-lactose-free-milk/prid/206314",
-        "Mother Dairy Toned Milk 500ml": "https://blinkit.com/prn/mother-dairy-toned-milk/prid/19925",
-        "Amul Taaza Toned Milk 200ml": "https://blinkit.com/prn/amul-taaza-toned-milk/prid/113945",
-        "Humpy Farms Cow A2 Milk": "https://blinkit.com/prn/humpy-farms-cow-a2-milk/prid/505525",
-        "Mother Dairy Toned Milk 1l": "https://blinkit.com/prn/mother-dairy-toned-milk/prid/32685",
-        "Amul Camel Milk": "https://blinkit.com/prn/amul-camel-milk/prid/427633",
-        "Amul Buffalo A2 Milk": "https://blinkit.com/prn/amul-buffalo-a2-milk/prid/522807",
-        "Gokul Taaza Pasteurized Toned Milk": "https://blinkit.com/prn/gokul-taaza-pasteurized-toned-milk/prid/499616",
-        "Britannia Brown Bread": "https://blinkit.com/prn/britannia-brown-bread/prid/15364",
-        "English Oven Brown Bread": "https://blinkit.com/prn/english-oven-brown-bread/prid/18396",
-        "English Oven Zero Maida Multigrain Bread": "https://blinkit.com/prn/english-oven-zero-maida-multigrain-bread/prid/18401",
-        "Modern White Bread": "https://blinkit.com/prn/modern-white-bread/prid/72209",
-        "Britannia Pav": "https://blinkit.com/prn/britannia-pav/prid/366180"
-    }
+def run_grocery_ordering(grocery_list, headless_mode, upi_id, user_id=None, progress=None, item_results=None):
+    """Execute the grocery ordering process using saved cookies - matches original app.py
+
+    progress: optional callable given each step's message as soon as it is known.
+    item_results: optional dict filled with {item: its own result message}, so the
+    caller can settle an order's lines; items never attempted are left out.
+    With CART_PARALLEL_SESSIONS > 1 the items are added through several pooled
+    browsers at once and then confirmed against the cart. With CART_DIFF, items
+    already in the cart are reported and skipped.
+    """
+    from selenium.common.exceptions import TimeoutException
+    from bot.waits import wait_for_page, wait_for_clickable, wait_for_click_effect, wait_for_payment
     
-    # Use enhanced Chrome driver with profile options
-    custom_options = [
-        r"--user-data-dir=C:\\Users\\HP\\SeleniumProfile",
-        r"--profile-directory=Automation"
-    ]
     
-    driver = create_chrome_driver(custom_options=custom_options, headless=headless_mode)
-    wait = WebDriverWait(driver, 15)
+    # Borrow a warm browser from the shared pool; the saved cookies carry the login
+    pooled = driver_pool.checkout(user_id=user_id, headless=headless_mode)
+    driver = pooled.driver
     results = []
+    if item_results is None:
+        item_results = {}
+
+    def report(message):
+        results.append(message)
+        if progress:
+            progress(message)
+    
+    def load_cookies(session):
+        if session.state.get("cookies") != fingerprint:
+            if not inject_cookies(session.driver, cookies):
+                return False
+            session.state["cookies"] = fingerprint
+        return True
+
+    def open_session():
+        """Extra pooled browser for this user, for parallel cart filling"""
+        extra = driver_pool.checkout(
+            user_id=user_id, headless=headless_mode, timeout=Config.CART_PARALLEL_SLOT_TIMEOUT
+        )
+        if not load_cookies(extra):
+            driver_pool.checkin(extra)
+            raise RuntimeError("saved cookies could not be loaded")
+        return extra
+
+    def add_item(session, item):
+        """Add one item through its direct link; returns the result message"""
+        driver = session.driver
+        try:
+            product_url = find_product_link(item)
+            if not product_url:
+                return f"⚠️ No direct link found for {item}"
+            driver.get(product_url)
+            try:
+                # Candidate selectors live in bot/selector_registry.py, best recent hit first
+                try:
+                    add_button = find_element(driver, "product_add", timeout=8)
+                except TimeoutException:
+                    return f"❌ No valid ADD button found for {item}"
+                
+                # Scroll to button and ensure it's visible
+                driver.execute_script("arguments[0].scrollIntoView(true);", add_button)
+                add_button = wait_for_clickable(driver, add_button, timeout=3)
+                
+                # Try multiple click methods
+                try:
+                    add_button.click()
+                except Exception as e:
+                    logging.debug(f"Native click on ADD for {item} failed ({str(e)[:80]}); clicking via script")
+                    driver.execute_script("arguments[0].click();", add_button)
+                # Don't navigate to the next product before the cart registers this one
+                wait_for_click_effect(add_button)
+                
+                return f"✅ {item} added to cart via direct link"
+            except Exception as e:
+                return f"❌ Add button interaction failed for {item}: {str(e)[:100]}"
+        except Exception as e:
+            return f"❌ Failed to add {item}: {str(e)[:100]}"
     
+    helpers = []
     try:
-        driver.get("https://www.blinkit.com")
-        
-        # Load cookies (exact same logic as original app.py)
-        if os.path.exists(cookies_file):
-            with open(cookies_file, "rb") as file:
-                cookies = pickle.load(file)
-                for cookie in cookies:
-                    driver.add_cookie(cookie)
-            driver.refresh()
-            time.sleep(5)
-        else:
-            results.append("❌ Cookies file not found. Please save cookies first.")
-            driver.quit()
+        # Saved login cookies go in before the first page load, so no home page
+        # visit or reload is needed; a session that already holds them skips this
+        cookies, fingerprint = user_cookies(user_id)
+        if not cookies:
+            report("❌ No saved cookies found. Please save cookies first.")
+            return results
+        if not load_cookies(pooled):
+            report("❌ Could not load saved cookies into the browser.")
             return results
         
-        # Add items to cart (exact same logic as original app.py)
-        for item in grocery_list:
-            try:
-                if item in PRODUCT_LINKS:
-                    driver.get(PRODUCT_LINKS[item])
-                    time.sleep(3)
-                    try:
-                        # Updated selectors for current Blinkit website
-                        add_selectors = [
-                            '//button[contains(@class, "tw-bg-green-050") and contains(text(), "ADD")]',
-                            '//button[contains(@class, "tw-border-base-green") and contains(text(), "ADD")]',
-                            '//div[@role="button" and contains(text(), "ADD")]',
-                            '//button[contains(text(), "Add to cart")]',
-                            '//div[@data-pf="reset" and contains(text(), "Add to cart")]'  # Fallback to old selector
-                        ]
-                        
-                        add_button = None
-                        for selector in add_selectors:
-                            try:
-                                add_button = WebDriverWait(driver, 8).until(
-                                    EC.element_to_be_clickable((By.XPATH, selector))
-                                )
-                                break
-                            except:
-                                continue
-                        
-                        if add_button:
-                            # Scroll to button and ensure it's visible
-                            driver.execute_script("arguments[0].scrollIntoView(true);", add_button)
-                            time.sleep(1)
-                            
-                            # Try multiple click methods
-                            try:
-                                add_button.click()
-                            except:
-                                driver.execute_script("arguments[0].click();", add_button)
-                            
-                            results.append(f"✅ {item} added to cart via direct link")
-                        else:
-                            results.append(f"❌ No valid ADD button found for {item}")
-                            continue
-                            
-                    except Exception as e:
-                        results.append(f"❌ Add button interaction failed for {item}: {str(e)[:100]}")
-                        continue
-                else:
-                    results.append(f"⚠️ No direct link found for {item}")
-            except Exception as e:
-                results.append(f"❌ Failed to add {item}: {str(e)[:100]}")
-            time.sleep(2)
+        # Items a previous (partial) run already put in the cart aren't added again
+        to_add = list(grocery_list)
+        if Config.CART_DIFF:
+            delta = cart_delta(
+                [(item, 1) for item in grocery_list], read_cart(driver),
+                {item: exact_pack_size(item) for item in grocery_list},
+            )
+            to_add = [item for item, (line, _) in zip(grocery_list, delta) if line is None]
+            for item, (line, _) in zip(grocery_list, delta):
+                if line is not None:
+                    item_results[item] = f"✅ {item} is already in the cart"
+                    report(item_results[item])
+            if not to_add:
+                # Checkout starts from the cart icon, which the cart page doesn't show
+                driver.get(Config.BLINKIT_BASE_URL)
+                wait_for_page(driver)
+
+        # Add items to cart, several browsers at once when CART_PARALLEL_SESSIONS > 1
+        sessions = min(Config.CART_PARALLEL_SESSIONS, len(to_add))
+        if sessions > 1:
+            helpers = borrow_sessions(open_session, sessions - 1)
+        if helpers:
+            added = run_parallel(to_add, [pooled] + helpers, add_item, on_result=report)
+            for session in helpers:
+                driver_pool.checkin(session)
+            helpers = []
+            # Concurrent adds can race; confirm each line against the cart itself
+            reconciled = reconcile_cart(to_add, added, read_cart_lines(driver))
+            for item, before, after in zip(to_add, added, reconciled):
+                item_results[item] = after
+                if after != before:
+                    report(after)
+            # Back to a page with the cart icon, now showing every session's adds
+            driver.get(Config.BLINKIT_BASE_URL)
+            wait_for_page(driver)
+        else:
+            for item in to_add:
+                item_results[item] = add_item(pooled, item)
+                report(item_results[item])
         
-        # Proceed to checkout with updated selectors
+        # Proceed to checkout
         try:
-            # Updated cart icon selectors
-            cart_selectors = [
-                "CartButton__CartIcon-sc-1fuy2nj-6",  # Original selector
-                "//div[contains(@class, 'CartButton__CartIcon')]",
-                "//*[contains(@class, 'cart-icon')]",
-                "//button[contains(@class, 'cart')]"
-            ]
-            
-            cart_clicked = False
-            for selector in cart_selectors:
-                try:
-                    if selector.startswith("//"):
-                        cart_icon = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    else:
-                        cart_icon = wait.until(EC.element_to_be_clickable((By.CLASS_NAME, selector)))
-                    
-                    driver.execute_script("arguments[0].click();", cart_icon)
-                    cart_clicked = True
-                    break
-                except:
-                    continue
-            
-            if not cart_clicked:
-                results.append("❌ Could not find or click cart icon")
+            try:
+                cart_icon = find_element(driver, "cart_icon")
+                driver.execute_script("arguments[0].click();", cart_icon)
+            except TimeoutException:
+                report("❌ Could not find or click cart icon")
                 return results
-                
-            time.sleep(3)
-            
-            # Updated checkout selectors
-            checkout_selectors = [
-                '//div[contains(text(), "Proceed To Pay") and contains(@class, "CheckoutStrip__CTAText-sc-1fzbdhy-13")]',  # Original
-                '//button[contains(text(), "Proceed") and contains(text(), "Pay")]',
-                '//div[contains(text(), "Proceed To Pay")]',
-                '//*[contains(@class, "checkout") and contains(text(), "Pay")]'
-            ]
             
-            checkout_clicked = False
-            for selector in checkout_selectors:
-                try:
-                    checkout = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    driver.execute_script("arguments[0].click();", checkout)
-                    checkout_clicked = True
-                    break
-                except:
-                    continue
-            
-            if not checkout_clicked:
-                results.append("❌ Could not find or click checkout button")
+            try:
+                checkout = find_element(driver, "checkout")
+                driver.execute_script("arguments[0].click();", checkout)
+            except TimeoutException:
+                report("❌ Could not find or click checkout button")
                 return results
-            results.append("✅ Checkout clicked")
-            time.sleep(5)
+            report("✅ Checkout clicked")
+            wait_for_page(driver)
             
             # Handle payment (enhanced version with UPI ID)
             try:
-                # Try to find existing UPI payment button first
-                try:
-                    existing_upi = wait.until(EC.element_to_be_clickable((By.XPATH, '//div[contains(@class, "Zpayments__Button-sc-127gezb-3") and contains(text(), "Pay Now")]')))
-                    driver.execute_script("arguments[0].click();", existing_upi)
-                    results.append("✅ Payment initiated with existing UPI")
-                except:
-                    # If no existing UPI, try to add new UPI with provided ID
+                # A saved UPI ("Pay Now") and the "Add new UPI ID" form are probed together
+                target, element = find_first(driver, ["upi_pay_now", "upi_add_new"])
+                driver.execute_script("arguments[0].click();", element)
+                if target == "upi_pay_now":
+                    report("✅ Payment initiated with existing UPI")
+                else:
+                    # If no existing UPI, add the provided ID
                     try:
-                        upi_header = wait.until(EC.element_to_be_clickable((By.XPATH, '//h5[contains(text(), "Add new UPI ID")]')))
-                        driver.execute_script("arguments[0].click();", upi_header)
-                        
-                        upi_input = wait.until(EC.presence_of_element_located((By.XPATH, '//input[@type="text" and contains(@class, "bbrwhB")]')))
+                        upi_input = find_element(driver, "upi_input")
                         upi_input.clear()
                         upi_input.send_keys(upi_id)
-                        time.sleep(1)
                         
-                        checkout_btn = wait.until(EC.element_to_be_clickable((By.XPATH, '//span[contains(text(), "Checkout")]')))
+                        checkout_btn = find_element(driver, "upi_confirm")
                         driver.execute_script("arguments[0].click();", checkout_btn)
-                        results.append(f"✅ UPI ID {upi_id} entered and payment initiated")
+                        report(f"✅ UPI ID {upi_id} entered and payment initiated")
                     except Exception as e:
-                        results.append(f"⚠️ UPI setup failed: {str(e)[:100]}")
+                        report(f"⚠️ UPI setup failed: {str(e)[:100]}")
                         
             except Exception as e:
-                results.append(f"⚠️ Payment process failed: {str(e)[:100]}")
+                report(f"⚠️ Payment process failed: {str(e)[:100]}")
                 
-            # Wait for payment completion (same as original app.py)
-            results.append("⏳ Waiting 6 minutes for payment completion...")
-            time.sleep(360)  # 6 minutes wait
+            # Hold the session until Blinkit confirms the order, at most PAYMENT_TIMEOUT_SECONDS
+            report("⏳ Waiting for payment completion...")
+            if wait_for_payment(driver):
+                report("✅ Payment confirmed")
+            else:
+                report("⚠️ Payment not confirmed in time; check your UPI app and Blinkit orders")
                 
         except Exception as e:
-            results.append(f"❌ Checkout failed: {str(e)[:100]}")
+            report(f"❌ Checkout failed: {str(e)[:100]}")
             
     except Exception as e:
-        results.append(f"❌ Ordering process failed: {str(e)[:100]}")
+        report(f"❌ Ordering process failed: {str(e)[:100]}")
     finally:
-        driver.quit()
+        for session in helpers:
+            driver_pool.checkin(session)
+        driver_pool.checkin(pooled)
     
     return results
 
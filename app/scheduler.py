@@ -0,0 +1,507 @@
+"""Background auto-order scheduler.
+
+Keeps a heap of ``(next_due, user_id)`` built from each user's own
+``check_interval_minutes`` and only wakes when the earliest entry is due.
+Preference changes are picked up through ``AutoOrderSchedule.changed_at``
+instead of rescanning every user on each pass, and pending ``ReorderEvent``
+rows (see app/reorder.py) send a user to the workers straight away.
+
+Due users are handed to a bounded worker pool (``AUTO_ORDER_WORKERS``) so
+one slow Chrome session doesn't hold up everyone else; the number of live
+browsers is separately capped by the shared driver pool (``MAX_CHROME_INSTANCES``).
+
+The leader also runs the ``OrderJob`` queue (app/jobs.py): orders, grocery
+lists and product searches that web routes enqueued instead of driving
+Chrome inside the request. They get their own pool (``ORDER_JOB_WORKERS``)
+so an interactive order never waits behind a batch of auto-orders.
+
+Only the holder of the ``SchedulerLease`` row runs users and jobs, so any number of
+web workers or dedicated processes can start a scheduler safely. Web workers
+don't start one unless ``SCHEDULER_ENABLED`` is set; run it on its own with::
+
+    gunicorn run:app          # web workers
+    python -m app.scheduler   # the single order worker
+"""
+
+import heapq
+import logging
+import os
+import queue
+import signal
+import socket
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Thread, Event, Lock
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, User, AutoOrderSchedule, ReorderEvent, SchedulerLease, low_stock_rows
+from app.ordering import filter_new_items, start_order, finish_order, order_item, item_query
+from app.bot_runs import start_run, finish_run, recover_dead_runs
+from app.jobs import queued_job_ids, claim_job, fail_orphaned_jobs, run_job
+
+DEFAULT_INTERVAL_MINUTES = 60
+# changed_at is stamped before the caller commits, so overlapping saves can land
+# out of order; each refresh re-reads rows this far behind the newest one it saw
+CHANGE_SLACK_SECONDS = 60
+LEASE_NAME = 'auto-order'
+
+_scheduler = None
+
+
+def mark_schedule_changed(user_id):
+    """Flag a user's auto-order settings as changed.
+
+    The row is only staged on the session; the caller commits it together with
+    the preference update and may then call ``wake_scheduler()``.
+    """
+    row = db.session.get(AutoOrderSchedule, user_id)
+    if row is None:
+        row = AutoOrderSchedule(user_id=user_id)
+        db.session.add(row)
+    row.changed_at = datetime.utcnow()
+
+
+def wake_scheduler():
+    """Nudge the in-process scheduler (if any) to pick up changes right away"""
+    if _scheduler is not None:
+        _scheduler.wake()
+
+
+def acquire_lease(name, holder, ttl_seconds):
+    """Take or renew the named lease; returns True if ``holder`` now owns it.
+
+    The conditional UPDATE is atomic, so of several processes racing for an
+    expired lease exactly one sees its row count come back as 1.
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    try:
+        updated = SchedulerLease.query.filter(
+            SchedulerLease.name == name,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now),
+        ).update({'holder': holder, 'expires_at': expires_at}, synchronize_session=False)
+        if not updated and db.session.get(SchedulerLease, name) is None:
+            db.session.add(SchedulerLease(name=name, holder=holder, expires_at=expires_at))
+            updated = 1
+        db.session.commit()
+        return bool(updated)
+    except IntegrityError:
+        # Another process created the row first
+        db.session.rollback()
+        return False
+
+
+def release_lease(name, holder):
+    """Give up the lease early so another scheduler can take over without waiting"""
+    SchedulerLease.query.filter_by(name=name, holder=holder).update(
+        {'expires_at': datetime.utcnow()}, synchronize_session=False
+    )
+    db.session.commit()
+
+
+class AutoOrderScheduler:
+    def __init__(self, app, poll_seconds=None):
+        self.app = app
+        self.poll_seconds = poll_seconds or app.config.get('SCHEDULER_POLL_SECONDS', 30)
+        self.event_poll_seconds = app.config.get('REORDER_EVENT_POLL_SECONDS', 5)
+        self.lease_seconds = app.config.get('SCHEDULER_LEASE_SECONDS', 120)
+        # Longest a live job goes without recording a step (a UPI payment wait), plus a lease of slack
+        self.job_stale_seconds = self.lease_seconds + app.config.get('PAYMENT_TIMEOUT_SECONDS', 360)
+        self._orphan_check_at = None
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._heap = []
+        self._due = {}  # user_id -> the heap entry currently valid for that user
+        self._watermark = None  # newest changed_at read so far
+        self._wake = Event()
+        self._stop = Event()
+        self._thread = None
+
+        # Worker pool; heap updates from workers come back through _completed
+        # so only the scheduler thread ever touches the heap
+        self.workers = app.config.get('AUTO_ORDER_WORKERS', 2)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='auto-order')
+        self._completed = queue.Queue()
+        self._jobs_lock = Lock()
+        self._queued = {}  # user_id -> due time, submitted but not started
+        self._running = {}  # user_id -> start time
+
+        # Separate pool for jobs queued by web requests
+        self.job_workers = app.config.get('ORDER_JOB_WORKERS', 2)
+        self._job_executor = ThreadPoolExecutor(max_workers=self.job_workers, thread_name_prefix='order-job')
+        self._jobs_active = 0
+
+    # Heap bookkeeping ---------------------------------------------------
+
+    def _push(self, user_id, next_due):
+        # Older entries for the same user stay in the heap and are skipped on pop
+        self._due[user_id] = next_due
+        heapq.heappush(self._heap, (next_due, user_id))
+
+    def _drop(self, user_id):
+        self._due.pop(user_id, None)
+
+    def _pop_due(self, now):
+        due_users = {}
+        while self._heap and self._heap[0][0] <= now:
+            next_due, user_id = heapq.heappop(self._heap)
+            if self._due.get(user_id) == next_due:
+                del self._due[user_id]
+                due_users[user_id] = next_due
+        return due_users
+
+    def _next_wakeup(self, now):
+        # Never sleep past the point where the lease needs renewing or
+        # reorder events from other processes need collecting
+        ceiling = min(self.poll_seconds, self.event_poll_seconds, self.lease_seconds / 3)
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return ceiling
+        seconds = (self._heap[0][0] - now).total_seconds()
+        return max(0, min(seconds, ceiling))
+
+    @staticmethod
+    def _interval(minutes):
+        return timedelta(minutes=minutes or DEFAULT_INTERVAL_MINUTES)
+
+    @staticmethod
+    def _user_interval(user_id):
+        """The user's check interval in minutes, or None (the default) if it can't be read"""
+        try:
+            return db.session.query(User.check_interval_minutes).filter_by(id=user_id).scalar()
+        except Exception as e:
+            db.session.rollback()
+            logging.warning(f"Could not read check interval for user {user_id}: {e}")
+            return None
+
+    def _in_flight(self, user_id):
+        with self._jobs_lock:
+            return user_id in self._queued or user_id in self._running
+
+    def _drain_completed(self):
+        while True:
+            try:
+                user_id, next_due = self._completed.get_nowait()
+            except queue.Empty:
+                return
+            if self.is_leader:
+                self._push(user_id, next_due)
+
+    # Loading state ------------------------------------------------------
+
+    def load(self):
+        """Build the heap from all auto-order users (done once at startup)"""
+        now = datetime.utcnow()
+        schedules = {row.user_id: row for row in AutoOrderSchedule.query.all()}
+        users = db.session.query(User.id, User.check_interval_minutes).filter(
+            User.auto_order_enabled.is_(True)
+        ).all()
+
+        self._heap = []
+        self._due = {}
+        for user_id, interval in users:
+            if self._in_flight(user_id):
+                continue  # Rescheduled when its running job completes
+            row = schedules.get(user_id)
+            self._push(user_id, self._due_time(row, interval, now))
+        self._watermark = max(
+            (row.changed_at for row in schedules.values() if row.changed_at),
+            default=now,
+        )
+        logging.info(f"Scheduler loaded {len(self._due)} auto-order users")
+
+    def _due_time(self, row, interval, now):
+        if row is None or row.last_run_at is None:
+            return now
+        return max(now, row.last_run_at + self._interval(interval))
+
+    def refresh_changed(self):
+        """Re-read only the users whose preferences changed since the last check.
+
+        Rows within CHANGE_SLACK_SECONDS of the watermark are read again, so a
+        save that committed after a newer-stamped one isn't skipped; rows whose
+        due time is unchanged are left alone.
+        """
+        now = datetime.utcnow()
+        changed = AutoOrderSchedule.query.filter(
+            AutoOrderSchedule.changed_at > self._watermark - timedelta(seconds=CHANGE_SLACK_SECONDS)
+        ).all()
+        for row in changed:
+            self._watermark = max(self._watermark, row.changed_at)
+            user = db.session.get(User, row.user_id)
+            if user is None or not user.auto_order_enabled:
+                self._drop(row.user_id)
+                continue
+            if self._in_flight(row.user_id):
+                continue
+            next_due = self._due_time(row, user.check_interval_minutes, now)
+            if self._due.get(row.user_id) != next_due:
+                self._push(row.user_id, next_due)
+
+    def collect_reorder_events(self):
+        """Claim pending reorder events; returns {user_id: oldest event time}.
+
+        Users with a run already in flight keep their events pending until it
+        finishes, so an item that went low mid-run still gets picked up.
+        """
+        pending = ReorderEvent.query.filter(
+            ReorderEvent.processed_at.is_(None)
+        ).order_by(ReorderEvent.id).all()
+        if not pending:
+            return {}
+
+        now = datetime.utcnow()
+        triggered = {}
+        for event in pending:
+            if self._in_flight(event.user_id):
+                continue
+            event.processed_at = now
+            triggered.setdefault(event.user_id, event.created_at or now)
+        db.session.commit()
+        return triggered
+
+    # Running users ------------------------------------------------------
+
+    def run_user(self, user_id, low_stock_items):
+        """Run one auto-order pass for a user and return their next due time.
+
+        low_stock_items: the user's low-stock ``order_item()`` dicts, fetched in
+        one batch for every due user by run_pending().
+        """
+        from bot.green_shelf_bot import GreenShelfBot
+
+        user = db.session.get(User, user_id)
+        if user is None or not user.auto_order_enabled:
+            return None
+
+        to_order = []
+        if user.upi_id and low_stock_items:
+            # A pass that died left its lines pending; settle them before de-duplicating
+            recover_dead_runs(user.id)
+            to_order, suppressed = filter_new_items(user.id, low_stock_items)
+            if suppressed:
+                logging.info(f"Skipping {len(suppressed)} in-flight items for user {user.id}: {[item_query(item) for item in suppressed]}")
+
+        if to_order:
+            order = start_order(user.id, to_order)
+            db.session.commit()
+            run = start_run(user.id, order.id)
+            bot = None
+            results = None
+            try:
+                bot = GreenShelfBot(user.upi_id, user_id=user.id)
+                results = bot.process_items(to_order, keep_browser=bool(user.checkout_enabled), run=run)
+                if user.checkout_enabled:
+                    bot.proceed_to_checkout_and_select_upi(user.upi_id)
+            except Exception as e:
+                logging.error(f"Auto-order failed for user {user.id}: {e}")
+            finally:
+                if bot is not None:
+                    bot.cleanup()
+                finish_order(order, results)
+                finish_run(run, results)
+                db.session.commit()
+
+        now = datetime.utcnow()
+        row = db.session.get(AutoOrderSchedule, user.id)
+        if row is None:
+            row = AutoOrderSchedule(user_id=user.id, changed_at=now)
+            db.session.add(row)
+        row.last_run_at = now
+        row.next_due_at = now + self._interval(user.check_interval_minutes)
+        db.session.commit()
+        return row.next_due_at
+
+    def _run_job(self, user_id, low_stock_items):
+        """Worker-pool entry point: one user's run in its own app context and session"""
+        with self._jobs_lock:
+            self._queued.pop(user_id, None)
+            self._running[user_id] = datetime.utcnow()
+        next_due = None
+        try:
+            with self.app.app_context():
+                try:
+                    next_due = self.run_user(user_id, low_stock_items)
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Scheduler error for user {user_id}: {e}")
+                    # Retry on the user's normal cadence rather than hammering them
+                    next_due = datetime.utcnow() + self._interval(self._user_interval(user_id))
+        finally:
+            with self._jobs_lock:
+                self._running.pop(user_id, None)
+            if next_due is not None:
+                self._completed.put((user_id, next_due))
+            self.wake()
+
+    def _submit(self, user_id, due_at, low_stock_items):
+        with self._jobs_lock:
+            self._queued[user_id] = due_at
+        self._executor.submit(self._run_job, user_id, low_stock_items)
+
+    def _run_order_job(self, job_id):
+        """Job-pool entry point: one queued web job in its own app context and session"""
+        try:
+            with self.app.app_context():
+                try:
+                    run_job(job_id)
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Order job {job_id} crashed: {e}")
+        finally:
+            with self._jobs_lock:
+                self._jobs_active -= 1
+            self.wake()
+
+    def collect_order_jobs(self):
+        """Claim queued web jobs up to the free job-worker slots; returns how many started"""
+        with self._jobs_lock:
+            free = self.job_workers - self._jobs_active
+        if free <= 0:
+            return 0
+        started = 0
+        for job_id in queued_job_ids(free):
+            if not claim_job(job_id, self.holder):
+                continue
+            with self._jobs_lock:
+                self._jobs_active += 1
+            self._job_executor.submit(self._run_order_job, job_id)
+            started += 1
+        return started
+
+    def stats(self):
+        """Queue depth / lag gauge for sizing AUTO_ORDER_WORKERS and MAX_CHROME_INSTANCES"""
+        from bot.drivers import driver_pool
+
+        now = datetime.utcnow()
+        with self._jobs_lock:
+            oldest_due = min(self._queued.values(), default=None)
+            return {
+                'workers': self.workers,
+                'queued': len(self._queued),
+                'running': len(self._running),
+                'jobs_running': self._jobs_active,
+                'max_lag_seconds': (now - oldest_due).total_seconds() if oldest_due else 0.0,
+                'chrome_in_use': driver_pool.stats()['in_use'],
+                'scheduled_users': len(self._due),
+            }
+
+    # Leadership ---------------------------------------------------------
+
+    def hold_lease(self):
+        """Take or renew the scheduler lease, resetting state on a leadership change"""
+        was_leader = self.is_leader
+        self.is_leader = acquire_lease(LEASE_NAME, self.holder, self.lease_seconds)
+        if self.is_leader and not was_leader:
+            logging.info(f"Scheduler {self.holder} acquired the lease")
+            # Another scheduler may have run users meanwhile; start from the DB
+            self.load()
+            self._orphan_check_at = datetime.utcnow()
+        elif was_leader and not self.is_leader:
+            logging.warning(f"Scheduler {self.holder} lost the lease")
+            self._heap, self._due, self._watermark = [], {}, None
+            self._orphan_check_at = None
+        return self.is_leader
+
+    def run_pending(self):
+        """Pick up preference changes and hand every due user to the worker pool"""
+        with self.app.app_context():
+            if not self.hold_lease():
+                return self.lease_seconds / 3
+            self._drain_completed()
+            if self._orphan_check_at is not None and datetime.utcnow() >= self._orphan_check_at:
+                # Jobs still quiet-but-young now are looked at again once they could be stale
+                fail_orphaned_jobs(self.holder, self.job_stale_seconds)
+                self._orphan_check_at = datetime.utcnow() + timedelta(seconds=self.job_stale_seconds)
+            self.collect_order_jobs()
+            self.refresh_changed()
+            due_users = self._pop_due(datetime.utcnow())
+            for user_id, event_time in self.collect_reorder_events().items():
+                # Jump the queue; the heap entry is replaced when this run completes
+                self._drop(user_id)
+                due_users.setdefault(user_id, event_time)
+            if due_users:
+                low_by_user = {}
+                for row in low_stock_rows(user_ids=list(due_users), auto_order_only=True):
+                    low_by_user.setdefault(row.user_id, []).append(order_item(row.query, row.needed, row.unit))
+                for user_id, due_at in due_users.items():
+                    if self._in_flight(user_id):
+                        continue  # Rescheduled when its running job completes
+                    self._submit(user_id, due_at, low_by_user.get(user_id, []))
+
+            gauge = self.stats()
+            if gauge['queued'] or gauge['running'] or gauge['jobs_running']:
+                logging.info(
+                    "Scheduler gauge: queued=%(queued)s running=%(running)s workers=%(workers)s "
+                    "lag=%(max_lag_seconds).0fs jobs=%(jobs_running)s chrome=%(chrome_in_use)s" % gauge
+                )
+            return self._next_wakeup(datetime.utcnow())
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                timeout = self.run_pending()
+            except Exception as e:
+                logging.error(f"Scheduler error: {e}")
+                with self.app.app_context():
+                    db.session.rollback()
+                timeout = 60  # Wait 1 minute before retrying
+            self._wake.wait(timeout)
+            self._wake.clear()
+        if self.is_leader:
+            with self.app.app_context():
+                release_lease(LEASE_NAME, self.holder)
+            self.is_leader = False
+
+    # Lifecycle ----------------------------------------------------------
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        # Running bot sessions finish on their own; queued ones are dropped
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._job_executor.shutdown(wait=False, cancel_futures=True)
+
+    def start(self):
+        # Daemon mode so the scheduler doesn't block interpreter exit
+        self._thread = Thread(target=self.run_forever, name='auto-order-scheduler', daemon=True)
+        self._thread.start()
+        return self
+
+
+def start_scheduler(app):
+    """Start the auto-order scheduler thread for ``app``"""
+    global _scheduler
+    _scheduler = AutoOrderScheduler(app).start()
+    return _scheduler
+
+
+def main():
+    """Run the scheduler in the foreground as a dedicated worker process"""
+    from app import create_app
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    app = create_app(with_scheduler=False)
+    # Resolve chromedriver up front rather than on the first user's order
+    from bot.drivers import chromedriver_path
+    chromedriver_path()
+    scheduler = AutoOrderScheduler(app)
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    logging.info(f"Starting auto-order scheduler {scheduler.holder}")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+        with app.app_context():
+            release_lease(LEASE_NAME, scheduler.holder)
+
+
+if __name__ == '__main__':
+    main()
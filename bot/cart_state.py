@@ -0,0 +1,137 @@
+"""What the Blinkit cart already holds, so an order only adds the difference.
+
+A retried order, or a scheduler run overlapping one still in the cart, would
+otherwise add every item again. ``read_cart`` opens the cart and reads every
+line (text, quantity, "+" button) in one script call; ``cart_delta`` matches
+the requested (query, packs) pairs against those lines, by whole words plus the
+pack size, so "milk" never claims a "butter milk" line. Then:
+
+- lines already holding enough packs need nothing;
+- lines holding fewer are stepped up on the cart page (``top_up``);
+- everything else goes through the usual add path.
+"""
+
+import logging
+import re
+from collections import namedtuple
+
+from config import Config
+from bot.units import parse_size, all_sizes, strip_sizes, same_size
+
+CART_URL = "https://www.blinkit.com/cart"
+
+# One CartLine per line on the cart page; plus is the line's "+" button (or None)
+CartLine = namedtuple('CartLine', ['text', 'quantity', 'plus', 'element'])
+
+# [text, quantity, plus button, line element] for each cart line; [] if none are recognisable.
+# The quantity is the number shown next to the line's stepper buttons (1 if not found).
+CART_LINES_SCRIPT = """
+const selectors = ['[class*="CartProduct"]', '[class*="CartItem"]', '[class*="cart-item"]', '[data-testid*="cart-item"]'];
+const isButton = el => el.matches('button, [role="button"]');
+const quantity = line => {
+    const counter = Array.from(line.querySelectorAll('*')).find(el =>
+        !el.children.length && /^\\d+$/.test(el.textContent.trim()) &&
+        el.parentElement && Array.from(el.parentElement.children).some(isButton));
+    return counter ? parseInt(counter.textContent.trim(), 10) : 1;
+};
+const plus = line => Array.from(line.querySelectorAll('button, [role="button"]')).find(el =>
+    el.innerText.trim() === '+' || /increase|increment/i.test(el.getAttribute('aria-label') || '')) || null;
+for (const selector of selectors) {
+    const lines = Array.from(document.querySelectorAll(selector))
+        .filter(el => !el.parentElement || !el.parentElement.closest(selector))
+        .filter(el => el.innerText.trim())
+        .map(el => [el.innerText.trim(), quantity(el), plus(el), el]);
+    if (lines.length) return lines;
+}
+return [];
+"""
+
+
+def _words(text):
+    """Whole product words of ``text`` (sizes left out)"""
+    return set(re.findall(r"[a-z0-9]+", strip_sizes(text)))
+
+
+def _significant_words(text):
+    return {word for word in _words(text) if len(word) > 2 or word.isdigit()}
+
+
+def in_cart(item, cart_lines):
+    """Whether some cart line holds every significant word of ``item`` as a whole word"""
+    wanted = _significant_words(item)
+    return any(wanted <= _words(line) for line in cart_lines)
+
+
+def cart_line_for(item, lines, size=None):
+    """The first CartLine that is ``item``: all its words, as whole words, and its pack size.
+
+    The size is the one ``item`` states, else ``size``; with neither, the line
+    can't be told apart from other variants (e.g. "milk" vs "butter milk"), so
+    no line matches and the item is added as usual.
+    """
+    expected = parse_size(item) or size
+    if expected is None:
+        return None
+    wanted = _significant_words(item)
+    for line in lines:
+        if wanted <= _words(line.text) and any(same_size(expected, found) for found in all_sizes(line.text)):
+            return line
+    return None
+
+
+def snapshot_lines(driver):
+    """CartLines for the cart page already open (one script call)"""
+    return [
+        CartLine(text.lower(), quantity, plus, element)
+        for text, quantity, plus, element in driver.execute_script(CART_LINES_SCRIPT)
+    ]
+
+
+def read_cart(driver):
+    """Open the cart and return its CartLines ([] when empty), or None if it couldn't be read"""
+    try:
+        from bot.waits import wait_for_page
+        driver.get(CART_URL)
+        wait_for_page(driver)
+        lines = snapshot_lines(driver)
+        logging.info(f"Cart holds {len(lines)} lines before adding")
+        return lines
+    except Exception as e:
+        logging.warning(f"Could not read the cart: {e}")
+        return None
+
+
+def cart_delta(requests, lines, sizes=None):
+    """(line, packs still to add) for each (query, packs) request, in order.
+
+    ``line`` is the CartLine already holding the query, or None when there is
+    none or ``lines`` is None (the cart couldn't be read). ``sizes`` maps
+    queries to the pack size they stand for, when the query doesn't say.
+    """
+    sizes = sizes or {}
+    delta = []
+    for query, packs in requests:
+        line = cart_line_for(query, lines, sizes.get(query)) if lines else None
+        delta.append((line, packs if line is None else max(0, packs - line.quantity)))
+    return delta
+
+
+def top_up(driver, line, packs):
+    """Click ``line``'s "+" until it holds ``packs``; returns the quantity reached"""
+    from bot.waits import wait_for_text_change
+    quantity = line.quantity
+    while quantity < packs and line.plus is not None:
+        try:
+            before = line.element.text
+            try:
+                line.plus.click()
+            except Exception:
+                driver.execute_script("arguments[0].click();", line.plus)
+        except Exception as e:
+            # e.g. the line re-rendered after the last click
+            logging.warning(f"Could not step up cart line: {str(e)[:80]}")
+            break
+        if not wait_for_text_change(line.element, before, timeout=Config.SELENIUM_TIMEOUT / 2):
+            break
+        quantity += 1
+    return quantity
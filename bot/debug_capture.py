@@ -0,0 +1,365 @@
+"""Debug artifacts (screenshot + page HTML) captured off the bot's hot path.
+
+``DEBUG_CAPTURE`` decides what gets kept:
+
+- ``all``: every capture point
+- ``sampled``: every failure, plus ``DEBUG_CAPTURE_SAMPLE_RATE`` of successes
+- ``failure``: failures only
+- ``off``: nothing (production)
+
+The bot only pulls the raw screenshot (base64, as Chrome returns it) and the
+page source from the browser; decoding and disk writes happen on one
+background writer thread. When the writer falls behind, new artifacts are
+dropped rather than making the bot wait.
+
+The writer also owns retention. Screenshots are re-encoded as
+``DEBUG_SCREENSHOT_FORMAT`` (WebP by default) and HTML dumps are gzipped.
+Every artifact gets a line in ``index.jsonl`` with its user/order/job tags, so
+``find_artifacts()`` never lists the directory. Between writes the thread
+prunes artifacts older than ``DEBUG_MAX_AGE_HOURS``, then the oldest ones
+until the folder fits ``DEBUG_MAX_TOTAL_MB``. It also indexes a few files the
+index doesn't know about on each pass: loose .png/.html from older versions
+(compressed first) and artifacts a writer died before indexing.
+
+Several processes (web app, scheduler) share the folder and its index. Each
+pass re-reads the index before pruning, and only rewrites it when something
+was pruned, keeping lines other processes appended in the meantime.
+"""
+
+import base64
+import gzip
+import io
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from queue import Queue, Full, Empty
+
+from PIL import Image
+
+from config import Config
+
+DEBUG_DIR = Path(__file__).resolve().parents[1] / "data" / "screenshots"
+INDEX_NAME = "index.jsonl"
+POLICIES = ("all", "sampled", "failure", "off")
+SCREENSHOT_FORMATS = {"webp": ("WEBP", ".webp"), "jpeg": ("JPEG", ".jpg"), "png": ("PNG", ".png")}
+# Loose (pre-index) files compressed per retention pass
+LEGACY_BATCH = 20
+# Artifact file suffixes, longest first so "x.html.gz" isn't read as "x.html" + ".gz"
+ARTIFACT_SUFFIXES = (".html.gz", ".webp", ".jpg", ".png", ".html")
+# Unindexed files younger than this may still be getting indexed by another process
+ORPHAN_GRACE_SECONDS = 60
+
+
+def should_capture(failure=False, policy=None, sample_rate=None):
+    """Whether the active policy keeps an artifact of this kind"""
+    policy = (policy or Config.DEBUG_CAPTURE).lower()
+    if policy not in POLICIES:
+        logging.warning(f"Unknown DEBUG_CAPTURE policy '{policy}'; capturing failures only")
+        policy = "failure"
+    if policy == "off":
+        return False
+    if failure or policy == "all":
+        return True
+    if policy == "sampled":
+        rate = Config.DEBUG_CAPTURE_SAMPLE_RATE if sample_rate is None else sample_rate
+        return random.random() < rate
+    return False
+
+
+def _artifact_name(file_name):
+    """(artifact name, suffix) for a debug file name, or (None, None) for other files"""
+    for suffix in ARTIFACT_SUFFIXES:
+        if file_name.endswith(suffix):
+            return file_name[:-len(suffix)], suffix
+    return None, None
+
+
+def _screenshot_format():
+    return SCREENSHOT_FORMATS.get(Config.DEBUG_SCREENSHOT_FORMAT.lower(), SCREENSHOT_FORMATS["webp"])
+
+
+def encode_screenshot(png_bytes, fmt=None, quality=None):
+    """Re-encode a PNG screenshot; returns (bytes, extension)"""
+    image_format, extension = fmt or _screenshot_format()
+    if image_format == "PNG":
+        return png_bytes, extension
+    try:
+        image = Image.open(io.BytesIO(png_bytes))
+        if image_format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        image.save(out, image_format, quality=quality or Config.DEBUG_SCREENSHOT_QUALITY)
+    except Exception as e:
+        logging.debug(f"Keeping screenshot as PNG; {image_format} encoding failed: {e}")
+        return png_bytes, ".png"
+    return out.getvalue(), extension
+
+
+class DebugWriter:
+    """Single daemon thread writing queued artifacts to ``directory`` and enforcing retention"""
+
+    def __init__(self, directory=DEBUG_DIR, max_pending=None):
+        self.directory = Path(directory)
+        self._queue = Queue(maxsize=max_pending or Config.DEBUG_CAPTURE_QUEUE_SIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._entries = None  # index lines, oldest first; loaded by the writer thread
+        self._total_bytes = 0
+        self._last_pass = 0.0
+        self._legacy_done = False
+
+    @property
+    def index_path(self):
+        return self.directory / INDEX_NAME
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name="debug-writer", daemon=True
+                    )
+                    self._thread.start()
+
+    def submit(self, name, screenshot_b64, html, tags=None, fmt=None):
+        """Queue one artifact; False if it was dropped because the writer is behind"""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((name, screenshot_b64, html, tags or {}, fmt))
+            return True
+        except Full:
+            logging.debug(f"Debug writer queue full; dropped {name}")
+            return False
+
+    def flush(self, timeout=None, prune=False):
+        """Block until everything queued so far is on disk (tests/shutdown)"""
+        done = threading.Event()
+        self._ensure_thread()
+        self._queue.put((None, done, None, {"prune": prune}, None), timeout=timeout)
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                name, screenshot_b64, html, tags, fmt = self._queue.get(
+                    timeout=Config.DEBUG_RETENTION_INTERVAL_SECONDS
+                )
+            except Empty:
+                self._retention_pass()
+                continue
+            try:
+                if name is None:
+                    if tags.get("prune"):
+                        self._retention_pass()
+                    screenshot_b64.set()  # flush marker
+                    continue
+                self._write(name, screenshot_b64, html, tags, fmt)
+                if time.monotonic() - self._last_pass >= Config.DEBUG_RETENTION_INTERVAL_SECONDS:
+                    self._retention_pass()
+            except Exception as e:
+                logging.warning(f"Could not write debug artifact {name}: {e}")
+            finally:
+                self._queue.task_done()
+
+    # Index ----------------------------------------------------------------
+
+    def _load_index(self, reload=False):
+        if self._entries is not None and not reload:
+            return
+        self._entries = []
+        if self.index_path.exists():
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        self._total_bytes = sum(entry.get("bytes", 0) for entry in self._entries)
+
+    def _append_index(self, entry):
+        self._entries.append(entry)
+        self._total_bytes += entry["bytes"]
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def _rewrite_index(self, dropped):
+        """Rewrite the index without the ``dropped`` entries.
+
+        The file is read again first, so lines other processes appended since
+        this pass loaded it are kept.
+        """
+        dropped = {(entry["name"], tuple(entry["files"])) for entry in dropped}
+        self._load_index(reload=True)
+        self._entries = [entry for entry in self._entries if (entry["name"], tuple(entry["files"])) not in dropped]
+        self._total_bytes = sum(entry.get("bytes", 0) for entry in self._entries)
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in self._entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp, self.index_path)
+
+    # Writing --------------------------------------------------------------
+
+    def _store(self, name, png_bytes, html, tags, created=None, fmt=None):
+        """Write compressed files for one artifact and index them; returns their names"""
+        files, size = [], 0
+        if png_bytes:
+            data, extension = encode_screenshot(png_bytes, fmt)
+            path = self.directory / f"{name}{extension}"
+            path.write_bytes(data)
+            files.append(path.name)
+            size += len(data)
+        if html is not None:
+            path = self.directory / f"{name}.html.gz"
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                f.write(html)
+            files.append(path.name)
+            size += path.stat().st_size
+        self._append_index({
+            "name": name,
+            "created": created or time.time(),
+            "files": files,
+            "bytes": size,
+            **{key: value for key, value in tags.items() if value is not None},
+        })
+        return files
+
+    def _write(self, name, screenshot_b64, html, tags, fmt=None):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+        png_bytes = base64.b64decode(screenshot_b64) if screenshot_b64 else None
+        self._store(name, png_bytes, html, tags, fmt=fmt)
+
+    # Retention ------------------------------------------------------------
+
+    def _adopt_legacy_files(self):
+        """Index a batch of debug files the index doesn't list; True if more remain.
+
+        Loose .png/.html files are compressed first (the .png is kept when PNG
+        is the configured format); .webp/.jpg/.html.gz files are indexed as they
+        are, so retention can prune them.
+        """
+        indexed = {file for entry in self._entries for file in entry["files"]}
+        settled_before = time.time() - ORPHAN_GRACE_SECONDS
+        loose = []
+        for path in self.directory.iterdir():
+            if path.name in indexed or _artifact_name(path.name)[0] is None:
+                continue
+            try:
+                if path.stat().st_mtime < settled_before:
+                    loose.append(path)
+            except FileNotFoundError:
+                continue
+        loose.sort()
+        orphans = {}
+        for path in loose[:LEGACY_BATCH]:
+            name, suffix = _artifact_name(path.name)
+            try:
+                created = path.stat().st_mtime
+                if suffix == ".png":
+                    stored = self._store(name, path.read_bytes(), None, {"legacy": True}, created)
+                elif suffix == ".html":
+                    stored = self._store(name, None, path.read_text(encoding="utf-8", errors="replace"),
+                                         {"legacy": True}, created)
+                else:
+                    orphans.setdefault(name, []).append((path.name, created, path.stat().st_size))
+                    continue
+                if path.name not in stored:
+                    path.unlink()
+            except Exception as e:
+                logging.warning(f"Could not adopt loose debug file {path.name}: {e}")
+        for name, files in orphans.items():
+            self._append_index({
+                "name": name,
+                "created": min(created for _, created, _ in files),
+                "files": [file for file, _, _ in files],
+                "bytes": sum(size for _, _, size in files),
+                "orphan": True,
+            })
+        return len(loose) > LEGACY_BATCH
+
+    def _delete(self, entry):
+        for file in entry["files"]:
+            try:
+                (self.directory / file).unlink()
+            except FileNotFoundError:
+                pass
+        self._total_bytes -= entry.get("bytes", 0)
+
+    def _retention_pass(self):
+        self._last_pass = time.monotonic()
+        if not self.directory.exists():
+            return
+        try:
+            # Other processes append to the same index
+            self._load_index(reload=True)
+            if not self._legacy_done:
+                self._legacy_done = not self._adopt_legacy_files()
+            cutoff = time.time() - Config.DEBUG_MAX_AGE_HOURS * 3600
+            budget = Config.DEBUG_MAX_TOTAL_MB * 1024 * 1024
+            self._entries.sort(key=lambda entry: entry["created"])
+            keep_from = 0
+            while keep_from < len(self._entries) and (
+                self._entries[keep_from]["created"] < cutoff or self._total_bytes > budget
+            ):
+                self._delete(self._entries[keep_from])
+                keep_from += 1
+            if keep_from:
+                self._rewrite_index(self._entries[:keep_from])
+                logging.info(f"Pruned {keep_from} debug artifacts; {self._total_bytes / 1048576:.1f} MB kept")
+        except Exception as e:
+            logging.warning(f"Debug artifact retention pass failed: {e}")
+
+    def find(self, **tags):
+        """Index entries (oldest first) whose tags match, e.g. ``find(user_id=3)``"""
+        entries = []
+        if self.index_path.exists():
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if all(entry.get(key) == value for key, value in tags.items()):
+                        entries.append(entry)
+        return entries
+
+
+debug_writer = DebugWriter()
+
+
+def find_artifacts(**tags):
+    """Debug artifacts for a user/order/job, from the index"""
+    return debug_writer.find(**tags)
+
+
+def capture_debug(driver, prefix, failure=False, tags=None, writer=None):
+    """Grab a screenshot and the page HTML if the policy wants them.
+
+    tags: identifiers stored in the index (user_id, order_id, job_id, ...).
+    Returns the screenshot file name the artifact will be written under, or
+    None when nothing was captured.
+    """
+    if not should_capture(failure):
+        return None
+    name = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    try:
+        screenshot = driver.get_screenshot_as_base64()
+    except Exception:
+        screenshot = None
+    try:
+        html = driver.page_source
+    except Exception:
+        html = None
+    if screenshot is None and html is None:
+        return None
+    tags = dict(tags or {}, prefix=prefix, failure=failure)
+    fmt = _screenshot_format()
+    if not (writer or debug_writer).submit(name, screenshot, html, tags, fmt):
+        return None
+    return f"{name}{fmt[1]}" if screenshot else f"{name}.html.gz"
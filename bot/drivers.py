@@ -0,0 +1,473 @@
+"""Shared Chrome/WebDriver plumbing for the bot and the web routes.
+
+``driver_pool`` keeps warm Chrome sessions that GreenShelfBot, the web routes
+and the scheduler check out and back in instead of cold-starting a browser
+per call. The pool also enforces the per-process cap on live browsers
+(``MAX_CHROME_INSTANCES``).
+
+The "lean" profile (``set_lean_mode``) blocks images, fonts, media and
+analytics through the DevTools ``Network.setBlockedURLs`` command; the bot only
+needs the DOM. ``page_load_stats`` reports load time and bytes transferred so
+the two profiles can be compared.
+"""
+
+import atexit
+import logging
+import time
+from pathlib import Path
+from threading import Condition, Lock
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from config import Config
+
+try:
+    from webdriver_manager.chrome import ChromeDriverManager
+    WEBDRIVER_MANAGER_AVAILABLE = True
+except ImportError:
+    WEBDRIVER_MANAGER_AVAILABLE = False
+
+
+# On-disk record of the last resolved chromedriver so new processes skip webdriver-manager
+DRIVER_PATH_CACHE = Path(__file__).resolve().parents[1] / "data" / "chromedriver_path.txt"
+
+# Site storage cleared when a pooled browser changes hands between users
+BLINKIT_ORIGINS = ("https://www.blinkit.com", "https://blinkit.com")
+
+_driver_path = None  # None: not resolved yet; "": let Selenium locate the driver itself
+_driver_path_source = None
+_driver_path_lock = Lock()
+
+
+def chromedriver_path():
+    """Return the chromedriver binary path, resolving it once per process.
+
+    Order: Config.CHROMEDRIVER_PATH, the on-disk cache, then webdriver-manager
+    (whose result is written to the cache). Returns None when nothing resolved,
+    in which case Selenium Manager finds a driver on its own.
+    """
+    global _driver_path, _driver_path_source
+    if _driver_path is not None:
+        return _driver_path or None
+    with _driver_path_lock:
+        if _driver_path is not None:
+            return _driver_path or None
+
+        started = time.monotonic()
+        path, source = "", "selenium-manager"
+        if Config.CHROMEDRIVER_PATH:
+            path, source = Config.CHROMEDRIVER_PATH, "config"
+        else:
+            try:
+                cached = DRIVER_PATH_CACHE.read_text(encoding="utf-8").strip()
+                if cached and Path(cached).is_file():
+                    path, source = cached, "disk cache"
+            except OSError:
+                pass
+            if not path and WEBDRIVER_MANAGER_AVAILABLE:
+                try:
+                    path, source = ChromeDriverManager().install(), "webdriver-manager"
+                    DRIVER_PATH_CACHE.parent.mkdir(parents=True, exist_ok=True)
+                    DRIVER_PATH_CACHE.write_text(path, encoding="utf-8")
+                except Exception as e:
+                    logging.error(f"webdriver-manager could not resolve chromedriver: {e}")
+
+        _driver_path, _driver_path_source = path, source
+        logging.info(f"Resolved chromedriver via {source} in {time.monotonic() - started:.2f}s: {path or '(auto)'}")
+        return _driver_path or None
+
+
+def forget_chromedriver_path():
+    """Drop a cached driver path that no longer works (e.g. Chrome was upgraded).
+
+    Returns True if there was a cached path to forget, so callers can retry once.
+    """
+    global _driver_path, _driver_path_source
+    with _driver_path_lock:
+        if _driver_path_source not in ("disk cache", "webdriver-manager"):
+            return False
+        _driver_path, _driver_path_source = None, None
+        try:
+            DRIVER_PATH_CACHE.unlink()
+        except OSError:
+            pass
+        return True
+
+
+# Network.setBlockedURLs matches URL patterns only, so resource types map to file extensions
+RESOURCE_TYPE_PATTERNS = {
+    "image": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"],
+    "font": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*"],
+    "media": ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*"],
+    "stylesheet": ["*.css*"],
+}
+
+PAGE_STATS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0] || {};
+const resources = performance.getEntriesByType('resource');
+return {
+    url: location.href,
+    dom_ms: nav.domContentLoadedEventEnd > 0 ? nav.domContentLoadedEventEnd - nav.startTime : null,
+    load_ms: nav.loadEventEnd > 0 ? nav.loadEventEnd - nav.startTime : null,
+    requests: resources.length + 1,
+    bytes: (nav.transferSize || 0) + resources.reduce((total, r) => total + (r.transferSize || 0), 0),
+};
+"""
+
+
+def lean_block_patterns():
+    """URL patterns blocked in lean mode, from the LEAN_BLOCKED_* settings"""
+    patterns = []
+    for resource_type in Config.LEAN_BLOCKED_RESOURCE_TYPES.split(","):
+        patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type.strip(), []))
+    patterns.extend(p.strip() for p in Config.LEAN_BLOCKED_URL_PATTERNS.split(",") if p.strip())
+    return patterns
+
+
+def set_lean_mode(driver, enabled):
+    """Switch request blocking on or off for an open driver; returns True on success"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": lean_block_patterns() if enabled else []})
+        return True
+    except Exception as e:
+        logging.warning(f"Could not {'enable' if enabled else 'disable'} lean browsing: {e}")
+        return False
+
+
+def _cdp_cookie(cookie):
+    """Selenium cookie dict -> DevTools CookieParam"""
+    param = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    if cookie.get("domain"):
+        param["domain"] = cookie["domain"]
+    else:
+        param["url"] = Config.BLINKIT_BASE_URL
+    if cookie.get("expiry"):
+        param["expires"] = cookie["expiry"]
+    if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+        param["sameSite"] = cookie["sameSite"]
+    return param
+
+
+def inject_cookies(driver, cookies):
+    """Set all ``cookies`` in one DevTools call; returns True on success.
+
+    Unlike ``add_cookie`` this works before the first navigation, so the first
+    page load is already logged in. Falls back to one ``add_cookie`` per cookie
+    (which needs the Blinkit origin open) if DevTools refuses.
+    """
+    if not cookies:
+        return False
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": [_cdp_cookie(c) for c in cookies]})
+        return True
+    except Exception as e:
+        logging.warning(f"Network.setCookies failed ({e}); adding cookies one by one")
+    try:
+        if not (driver.current_url or "").startswith(Config.BLINKIT_BASE_URL):
+            driver.get(Config.BLINKIT_BASE_URL)
+        for cookie in cookies:
+            driver.add_cookie(cookie)
+        return True
+    except Exception as e:
+        logging.warning(f"Failed to load cookies: {e}")
+        return False
+
+
+def page_load_stats(driver):
+    """Timing and transfer size of the current page, or {} if unavailable"""
+    try:
+        return driver.execute_script(PAGE_STATS_SCRIPT) or {}
+    except Exception:
+        return {}
+
+
+def format_page_stats(stats):
+    def ms(value):
+        return f"{value:.0f} ms" if value is not None else "n/a"
+    return (f"DOM {ms(stats.get('dom_ms'))}, load {ms(stats.get('load_ms'))}, "
+            f"{stats.get('requests', 0)} requests, {stats.get('bytes', 0) / 1024:.0f} KB")
+
+
+def chrome_service():
+    """Selenium Service for the resolved chromedriver; use it for any webdriver.Chrome()"""
+    path = chromedriver_path()
+    return Service(path) if path else Service()
+
+
+def _start_chrome(options):
+    return webdriver.Chrome(service=chrome_service(), options=options)
+
+
+def build_chrome_options(headless=False, custom_options=None):
+    """Chrome options shared by every driver the app starts"""
+    options = Options()
+
+    # Reasonable Chrome options for reliability
+    # Keep JavaScript, images, and renderer functionality enabled so target sites work correctly.
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-notifications")
+    options.add_argument("--disable-popup-blocking")
+    options.add_argument("--window-size=1280,900")
+    # Optional: start maximized when running with a visible browser
+    if not headless:
+        options.add_argument("--start-maximized")
+
+    # User agent to reduce simple bot-detection heuristics
+    options.add_argument(
+        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    )
+
+    # Add custom options if provided
+    if custom_options:
+        for arg in custom_options:
+            options.add_argument(arg)
+
+    # Headless mode configuration (use new headless if requested)
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-software-rasterizer")
+
+    # Reduce noisy logs from the browser
+    options.add_argument("--log-level=3")
+    options.add_experimental_option('useAutomationExtension', False)
+    # Make automation less obvious
+    options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    if Config.NETWORK_CAPTURE:
+        # Network events for bot/network_capture.py
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def create_chrome_driver(custom_options=None, headless=False, lean=False):
+    """Start a new, unpooled Chrome driver with fallbacks for odd environments.
+
+    Prefer ``driver_pool.checkout()``; use this only for sessions that can't be
+    shared, such as a visible browser with a dedicated profile for manual login.
+    lean: block heavy resources from the start (see ``set_lean_mode``).
+    """
+    options = build_chrome_options(headless=headless, custom_options=custom_options)
+    started = time.monotonic()
+    try:
+        try:
+            driver = _start_chrome(options)
+        except Exception as e:
+            if not forget_chromedriver_path():
+                raise
+            logging.warning(f"Cached chromedriver failed ({e}); resolving it again")
+            driver = _start_chrome(options)
+        logging.info(f"Chrome started in {time.monotonic() - started:.2f}s (headless={headless})")
+    except Exception as e:
+        logging.error(f"Failed to create Chrome driver: {e}")
+        # Fallback with minimal options
+        fallback_options = Options()
+        fallback_options.add_argument("--no-sandbox")
+        fallback_options.add_argument("--disable-dev-shm-usage")
+        if headless:
+            fallback_options.add_argument("--headless=new")
+        if custom_options:
+            for arg in custom_options:
+                fallback_options.add_argument(arg)
+
+        try:
+            driver = _start_chrome(fallback_options)
+        except Exception as e2:
+            logging.error(f"Failed to create fallback Chrome driver: {e2}")
+            raise e2
+
+    if lean:
+        set_lean_mode(driver, True)
+    return driver
+
+
+class PooledDriver:
+    """A pooled Chrome session plus the bookkeeping the pool needs to recycle it"""
+
+    def __init__(self, driver, headless):
+        self.driver = driver
+        self.headless = headless
+        self.created_at = time.monotonic()
+        self.uses = 0
+        self.user_id = None
+        self.lean = False
+        # Per-session facts callers may cache (e.g. which pincode is applied)
+        self.state = {}
+
+    @property
+    def age(self):
+        return time.monotonic() - self.created_at
+
+
+class DriverPool:
+    """Checkout/checkin pool of warm Chrome drivers.
+
+    - checkout() hands out an idle healthy driver for the same headless mode,
+      starting a new one while under ``max_size`` and otherwise waiting.
+    - A driver is retired once it is older than ``max_age`` seconds, has
+      served ``max_uses`` checkouts, or fails its health check.
+    - Cookies are cleared whenever a driver moves to a different user.
+    """
+
+    def __init__(self, max_size=None, max_age=None, max_uses=None):
+        self.max_size = max_size or Config.MAX_CHROME_INSTANCES
+        self.max_age = max_age or Config.DRIVER_MAX_AGE_SECONDS
+        self.max_uses = max_uses or Config.DRIVER_MAX_USES
+        self._idle = []
+        self._live = 0
+        self._in_use = 0
+        self._cond = Condition()
+
+    # Lifecycle helpers --------------------------------------------------
+
+    def _expired(self, pooled):
+        return pooled.age > self.max_age or pooled.uses >= self.max_uses
+
+    @staticmethod
+    def _healthy(pooled):
+        try:
+            pooled.driver.execute_script("return 1")
+            return len(pooled.driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def _retire(self, pooled):
+        """Quit a driver outside the lock and free its slot"""
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logging.warning(f"Error quitting pooled driver: {e}")
+        with self._cond:
+            self._live -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _reset_for_user(pooled, user_id):
+        """Drop the previous user's cookies and Blinkit site storage; raises if they can't be cleared"""
+        if pooled.user_id == user_id:
+            return
+        try:
+            pooled.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except Exception:
+            pooled.driver.delete_all_cookies()
+        # Cart, location and session data also live in localStorage/IndexedDB
+        for origin in BLINKIT_ORIGINS:
+            pooled.driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        pooled.state.clear()
+        pooled.user_id = user_id
+
+    # Public API -----------------------------------------------------------
+
+    def checkout(self, user_id=None, headless=False, timeout=None, lean=None):
+        """Borrow a driver; always hand it back with checkin().
+
+        lean: block heavy resources for this checkout (defaults to Config.LEAN_BROWSING).
+        """
+        timeout = Config.CHROME_SLOT_TIMEOUT if timeout is None else timeout
+        lean = Config.LEAN_BROWSING if lean is None else bool(lean)
+        deadline = time.monotonic() + timeout
+        while True:
+            pooled = None
+            stale = None
+            start_new = False
+            with self._cond:
+                for candidate in reversed(self._idle):
+                    if candidate.headless == headless:
+                        self._idle.remove(candidate)
+                        pooled = candidate
+                        break
+                if pooled is None:
+                    if self._live < self.max_size:
+                        self._live += 1
+                        start_new = True
+                    elif self._idle:
+                        # Full, but an idle driver of the other mode can make room
+                        stale = self._idle.pop(0)
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise RuntimeError(
+                                f"All {self.max_size} browser sessions are busy; try again shortly"
+                            )
+                        self._cond.wait(remaining)
+                        continue
+
+            if stale is not None:
+                self._retire(stale)
+                continue
+
+            if pooled is not None and (self._expired(pooled) or not self._healthy(pooled)):
+                self._retire(pooled)
+                continue
+
+            if start_new:
+                try:
+                    pooled = PooledDriver(create_chrome_driver(headless=headless), headless)
+                except Exception:
+                    with self._cond:
+                        self._live -= 1
+                        self._cond.notify()
+                    raise
+
+            try:
+                self._reset_for_user(pooled, user_id)
+            except Exception:
+                # Never hand one user's session to another
+                self._retire(pooled)
+                raise
+            if pooled.lean != lean and set_lean_mode(pooled.driver, lean):
+                pooled.lean = lean
+            pooled.uses += 1
+            with self._cond:
+                self._in_use += 1
+            return pooled
+
+    def checkin(self, pooled, healthy=True):
+        """Return a driver to the pool, or retire it if it is worn out or broken"""
+        with self._cond:
+            self._in_use -= 1
+        if not healthy or self._expired(pooled):
+            self._retire(pooled)
+            return
+        try:
+            # Stop page activity while idle and drop any extra tabs
+            handles = pooled.driver.window_handles
+            for handle in handles[1:]:
+                pooled.driver.switch_to.window(handle)
+                pooled.driver.close()
+            pooled.driver.switch_to.window(handles[0])
+            pooled.driver.get("about:blank")
+            if Config.NETWORK_CAPTURE:
+                # Chromedriver buffers performance events until they are read
+                pooled.driver.get_log("performance")
+        except Exception:
+            self._retire(pooled)
+            return
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {'live': self._live, 'in_use': self._in_use, 'idle': len(self._idle), 'max_size': self.max_size}
+
+    def shutdown(self):
+        """Quit every idle driver (drivers still checked out are quit on checkin)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._retire(pooled)
+
+
+driver_pool = DriverPool()
+atexit.register(driver_pool.shutdown)
@@ -1,106 +1,173 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
 import logging
-import pickle
-import os
+import re
 import time
+from urllib.parse import unquote
 from config import Config
-from pathlib import Path
-from datetime import datetime
+from bot.drivers import driver_pool, page_load_stats, format_page_stats, inject_cookies
+from bot.waits import wait_until, wait_for_network_idle, wait_for_click_effect, wait_for_text_change
+from bot.network_capture import capture_products, drain_performance_log
+from bot.debug_capture import capture_debug
+from bot.selector_registry import find_element
+from bot.parallel_cart import run_parallel, borrow_sessions, read_cart_lines, reconcile_cart
+from bot.cart_state import read_cart, cart_delta, top_up
+
+# Link from a search result (or anything inside one) to its product page
+PRODUCT_LINK_XPATH = "./ancestor-or-self::a[contains(@href, '/prn/')] | .//a[contains(@href, '/prn/')]"
+
+# Reads every search result card in one round-trip
+SEARCH_CARDS_SCRIPT = """
+const maxResults = arguments[0];
+const snapshot = document.evaluate(
+    "//div[contains(@class,'Product') or contains(@class,'product')]",
+    document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const seen = new Set();
+const products = [];
+for (let i = 0; i < snapshot.snapshotLength && products.length < maxResults; i++) {
+    const card = snapshot.snapshotItem(i);
+    const nameEl = card.querySelector("[class*='title'], [class*='name'], h3, h2");
+    const name = nameEl ? (nameEl.innerText || '').trim() : '';
+    if (!name) continue;
+    const img = card.querySelector('img');
+    const image = img ? (img.getAttribute('src') || '') : '';
+    // Wrapper divs repeat their first card; keep one entry per product
+    const key = name + '|' + image;
+    if (seen.has(key)) continue;
+    seen.add(key);
+
+    const text = card.innerText || '';
+    const price = text.match(/₹\\s*([\\d,]+(?:\\.\\d+)?)/);
+    const size = text.match(/\\b\\d+(?:\\.\\d+)?\\s*(?:ml|l|ltr|litre|g|gm|kg|pcs?|pack|units?)\\b/i);
+    const link = card.closest("a[href*='/prn/']") || card.querySelector("a[href*='/prn/']");
+    products.push({
+        name: name,
+        image: image,
+        price: price ? parseFloat(price[1].replace(/,/g, '')) : null,
+        size: size ? size[0] : null,
+        url: link ? link.href : null,
+    });
+}
+return products;
+"""
+
+# Blinkit pages with the app's header search box (the cart and checkout have none)
+BLINKIT_PAGE = re.compile(r"^https://(www\.)?blinkit\.com/(?!(cart|checkout|payment)\b)")
+
+RESULT_CARDS_XPATH = "//div[contains(@class,'Product') or contains(@class,'product')][.//button]"
+# The product card (or, failing that, the button's grandparent) around an ADD button
+ADD_CARD_XPATH = "ancestor::div[contains(@class,'Product') or contains(@class,'product')][1]"
+# [increase button, quantity shown] of the stepper inside arguments[0] (the card an
+# item was added from); null once the card has left the page. The quantity is the
+# number next to the stepper's buttons, null if none is shown.
+CARD_STEPPER_SCRIPT = """
+const card = arguments[0];
+if (!card || !card.isConnected) return null;
+const isButton = el => el.matches('button, [role="button"]');
+const plus = Array.from(card.querySelectorAll('button, [role="button"], [data-testid*="increment"]')).find(el =>
+    el.innerText.trim() === '+' ||
+    /increase|increment/i.test((el.getAttribute('aria-label') || '') + ' ' + (el.getAttribute('data-testid') || ''))) || null;
+const counter = Array.from(card.querySelectorAll('*')).find(el =>
+    !el.children.length && /^\\d+$/.test(el.textContent.trim()) &&
+    el.parentElement && Array.from(el.parentElement.children).some(isButton));
+return [plus, counter ? parseInt(counter.textContent.trim(), 10) : null];
+"""
+# Whether the page shows the results for arguments[0]: the SPA puts the query in
+# the URL (/s/?q=...) or in the results heading. Cards can't be told apart
+# instead: React reuses a card's node when a product is in two searches in a row.
+SEARCH_SHOWN_SCRIPT = """
+const query = arguments[0].trim().toLowerCase();
+const params = new URLSearchParams(location.search);
+if ((params.get('q') || '').trim().toLowerCase() === query) return true;
+return Array.from(document.querySelectorAll('h1, h2, h3, [class*="SearchResults"], [class*="search-results"]'))
+    .some(el => (el.innerText || '').toLowerCase().includes(query));
+"""
+
+# Where Blinkit keeps the chosen delivery location: a cookie holding the pincode,
+# and a localStorage entry holding the location (JSON with a pincode field, or the bare pincode)
+LOCATION_COOKIE = "gr_1_pincode"
+LOCATION_STORAGE_KEY = "location"
+# The pincode in that localStorage entry, as a string, or null
+LOCATION_PROBE_SCRIPT = """
+const raw = localStorage.getItem(arguments[0]);
+if (raw === null) return null;
+try {
+    const location = JSON.parse(raw);
+    if (location && typeof location === 'object') {
+        const pincode = location.pincode ?? location.postal_code ?? location.zip;
+        return pincode === undefined || pincode === null ? null : String(pincode).trim();
+    }
+    return String(location).trim();
+} catch (e) {
+    return raw.trim();
+}
+"""
+
 
 class GreenShelfBot:
-    def __init__(self, upi_id, user_id=None, headless=False):
+    def __init__(self, upi_id, user_id=None, headless=False, pool=None, lean=None, debug_tags=None, pincode=None,
+                 slot_timeout=None):
         """Initialize bot.
 
         headless: if True, run Chrome in headless mode regardless of Config.HEADLESS
+        pool: DriverPool to borrow a warm browser from (defaults to the shared pool)
+        lean: block images/fonts/media/analytics (defaults to Config.LEAN_BROWSING)
+        debug_tags: extra ids (order_id, job_id) indexed with this run's debug artifacts
+        pincode: delivery pincode (defaults to the user's, then Config.PINCODE)
+        slot_timeout: seconds to wait for a pooled browser (defaults to Config.CHROME_SLOT_TIMEOUT)
         """
         self.upi_id = upi_id
         self.user_id = user_id
+        self.pincode = pincode or self._user_pincode() or Config.PINCODE or ""
+        self.debug_tags = dict(debug_tags or {}, user_id=user_id)
         self.headless = headless
-        self.options = Options()
-        
-        # Reasonable Chrome options for reliability
-        # Keep JavaScript, images, and renderer functionality enabled so target sites work correctly.
-        self.options.add_argument("--no-sandbox")
-        self.options.add_argument("--disable-dev-shm-usage")
-        self.options.add_argument("--disable-extensions")
-        self.options.add_argument("--disable-notifications")
-        self.options.add_argument("--disable-popup-blocking")
-        self.options.add_argument("--window-size=1280,900")
-        # Optional: start maximized when running with a visible browser
-        if not (self.headless or Config.HEADLESS):
-            self.options.add_argument("--start-maximized")
-
-        # User agent to reduce simple bot-detection heuristics
-        self.options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+        self.pool = pool or driver_pool
 
-        # Headless mode configuration (use new headless if requested)
-        if self.headless or Config.HEADLESS:
-            # Use the newer headless mode where available
-            self.options.add_argument("--headless=new")
-            self.options.add_argument("--disable-software-rasterizer")
-
-        # Reduce noisy logs from the browser
-        self.options.add_argument("--log-level=3")
-        self.options.add_experimental_option('excludeSwitches', ['enable-logging'])
-        self.options.add_experimental_option('useAutomationExtension', False)
-        # Make automation less obvious
-        self.options.add_experimental_option('excludeSwitches', ['enable-automation'])
-        self.options.add_argument('--disable-blink-features=AutomationControlled')
-        
-        try:
-            # Use webdriver-manager to automatically handle ChromeDriver
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=self.options)
-        except Exception as e:
-            logging.error(f"Failed to initialize Chrome driver with webdriver-manager: {e}")
-            try:
-                # Fallback: try without service (manual ChromeDriver)
-                self.driver = webdriver.Chrome(options=self.options)
-            except Exception as e2:
-                logging.error(f"Failed to initialize Chrome driver manually: {e2}")
-                # Final fallback: try with minimal options
-                fallback_options = Options()
-                fallback_options.add_argument("--no-sandbox")
-                fallback_options.add_argument("--disable-dev-shm-usage") 
-                if Config.HEADLESS:
-                    fallback_options.add_argument("--headless=new")
-                try:
-                    service = Service(ChromeDriverManager().install())
-                    self.driver = webdriver.Chrome(service=service, options=fallback_options)
-                except Exception:
-                    self.driver = webdriver.Chrome(options=fallback_options)
+        # Borrow a warm browser; cleanup() hands it back to the pool
+        self.driver = None
+        self._pooled = self.pool.checkout(
+            user_id=user_id, headless=bool(self.headless or Config.HEADLESS), timeout=slot_timeout, lean=lean
+        )
+        self.driver = self._pooled.driver
+        self.lean = self._pooled.lean
+        self.page_stats = []  # one entry per page load, for comparing lean vs full loads
+        self.item_timings = []  # one entry per process_items item
+        self.item_urls = {}  # product page each item was added from, when known
+        self._reloads = 0
+        self._added_card = None  # card of the last ADD click, whose stepper _add_more_packs uses
+        self._session_ready = False
         self.wait = WebDriverWait(self.driver, Config.SELENIUM_TIMEOUT)
         self.short_wait = WebDriverWait(self.driver, 5)
-        self.debug_dir = Path(__file__).resolve().parents[1] / "data" / "screenshots"
-        self.debug_dir.mkdir(parents=True, exist_ok=True)
     
     def _load_user_cookies(self):
-        """Load user-specific cookies if available"""
+        """Put the user's saved login cookies into the browser; True if it has them.
+
+        Call before the first navigation: they go in with one DevTools call, so no
+        reload is needed, and a pooled session that already holds them is left alone.
+        """
         if not self.user_id:
             return False
-        
-        cookies_file = f"cookies_{self.user_id}.pkl"
-        if os.path.exists(cookies_file):
-            try:
-                with open(cookies_file, "rb") as file:
-                    cookies = pickle.load(file)
-                    for cookie in cookies:
-                        self.driver.add_cookie(cookie)
-                return True
-            except Exception as e:
-                logging.warning(f"Failed to load cookies: {e}")
+        try:
+            from app.cookie_store import user_cookies
+            cookies, fingerprint = user_cookies(self.user_id)
+        except Exception as e:
+            # No app context (e.g. a standalone script)
+            logging.warning(f"Saved cookies unavailable: {e}")
+            return False
+        if not cookies:
+            return False
+        if self._pooled.state.get("cookies") == fingerprint:
+            return True
+        if inject_cookies(self.driver, cookies):
+            self._pooled.state["cookies"] = fingerprint
+            return True
         return False
     
-    def _safe_click(self, locator):
-        elem = self.wait.until(EC.element_to_be_clickable(locator))
+    def _safe_click(self, target, timeout=None):
+        """Click the first match for a selector_registry target name"""
+        elem = find_element(self.driver, target, timeout)
         try:
             elem.click()
         except Exception:
@@ -112,144 +179,596 @@ class GreenShelfBot:
         except Exception:
             pass
 
-    def _save_debug(self, prefix: str) -> str:
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        screenshot_path = self.debug_dir / f"{prefix}_{ts}.png"
-        html_path = self.debug_dir / f"{prefix}_{ts}.html"
+    def _save_debug(self, prefix: str, failure: bool = False):
+        """Queue a screenshot + HTML per the DEBUG_CAPTURE policy; returns its file name or None"""
+        return capture_debug(self.driver, prefix, failure=failure, tags=self.debug_tags)
+
+    def _confirm_click(self, button):
+        """Wait until an ADD click registers, so the next navigation can't drop it"""
+        if not wait_for_click_effect(button):
+            logging.debug("ADD click had no visible effect within the wait")
+
+    def _record_item_timing(self, item, via, started, ok, packs=1):
+        timing = {
+            "item": item,
+            "seconds": round(time.monotonic() - started, 2),
+            "via": via,
+            "reloads": self._reloads,
+            "packs": packs,
+            "ok": ok,
+        }
+        self.item_timings.append(timing)
+        logging.info(f"Item '{item}' took {timing['seconds']:.2f}s via {via} ({self._reloads} page reloads)")
+        return timing
+
+    def _record_page_load(self, label):
+        stats = page_load_stats(self.driver)
+        if stats:
+            stats.update(label=label, lean=self.lean)
+            self.page_stats.append(stats)
+            logging.info(f"Page load {label} (lean={'on' if self.lean else 'off'}): {format_page_stats(stats)}")
+        return stats
+
+    def _user_pincode(self):
+        if not self.user_id:
+            return None
         try:
-            self.driver.save_screenshot(str(screenshot_path))
-        except Exception:
-            pass
+            from app.models import db, User
+            return db.session.query(User.pincode).filter_by(id=self.user_id).scalar()
+        except Exception as e:
+            # No app context (e.g. a standalone script)
+            logging.debug(f"User pincode unavailable: {e}")
+            return None
+
+    def _location_applied(self):
+        """Whether Blinkit's location cookie or storage entry holds exactly ``self.pincode`` (no page load)"""
         try:
-            with open(html_path, "w", encoding="utf-8") as f:
-                f.write(self.driver.page_source)
+            cookies = self.driver.execute_cdp_cmd("Network.getCookies", {"urls": [Config.BLINKIT_BASE_URL]})
+            if any(
+                c.get("name") == LOCATION_COOKIE and unquote(c.get("value", "")).strip() == self.pincode
+                for c in cookies.get("cookies", [])
+            ):
+                return True
         except Exception:
             pass
-        return screenshot_path.name
+        if (self.driver.current_url or "").startswith(Config.BLINKIT_BASE_URL):
+            try:
+                return self.driver.execute_script(LOCATION_PROBE_SCRIPT, LOCATION_STORAGE_KEY) == self.pincode
+            except Exception:
+                pass
+        return False
 
     def _set_location_if_needed(self):
+        """Apply ``self.pincode`` once per pooled session.
+
+        The applied pincode is remembered in the session's state (cleared when
+        the browser moves to another user) only once the probe confirms it, so
+        the dialog runs again for a pincode that didn't take.
+        """
+        if not self.pincode or self._pooled.state.get("pincode") == self.pincode:
+            return
+        if self._location_applied():
+            self._pooled.state["pincode"] = self.pincode
+            return
         # Blinkit often asks for a location/pincode before showing items
         try:
-            # Try to detect location prompt
             self.driver.get("https://www.blinkit.com/")
-            if Config.PINCODE:
-                # Open location change if present
-                try:
-                    self.short_wait.until(EC.presence_of_element_located((By.XPATH, "//button[contains(., 'Select location') or contains(., 'Deliver to') or contains(., 'Change')]")))
-                    self._safe_click((By.XPATH, "//button[contains(., 'Select location') or contains(., 'Deliver to') or contains(., 'Change')][1]"))
-                except Exception:
-                    pass
+            # Open location change if present
+            try:
+                self._safe_click("location_open", timeout=5)
+            except Exception:
+                pass
 
-                # Enter pincode
+            # Enter pincode
+            try:
+                pin_input = find_element(self.driver, "pincode_input")
+                pin_input.clear()
+                pin_input.send_keys(self.pincode)
+                # submit
                 try:
-                    pin_input = self.wait.until(EC.presence_of_element_located((By.XPATH, "//input[@type='text' and (contains(@placeholder,'pin') or contains(@placeholder,'Pin'))]")))
-                    pin_input.clear()
-                    pin_input.send_keys(Config.PINCODE)
-                    # submit
-                    try:
-                        self._safe_click((By.XPATH, "//button[contains(., 'Apply') or contains(., 'Save') or contains(., 'Confirm')]"))
-                    except Exception:
-                        pin_input.submit()
+                    self._safe_click("location_apply")
                 except Exception:
-                    pass
+                    pin_input.submit()
+            except Exception:
+                pass
+            if self._location_applied():
+                self._pooled.state["pincode"] = self.pincode
+            else:
+                logging.warning(f"Pincode {self.pincode} not confirmed after the location dialog; it will be tried again")
         except Exception as e:
             logging.warning(f"Location step skipped: {e}")
 
-    def process_items(self, items, keep_browser: bool = False):
-        """Add items to cart.
+    # Known product pages (app/product_links.py, app/product_urls.py) -------
 
-        keep_browser: when True, do not quit the browser at the end so caller can proceed to checkout.
-        """
-        results = []
+    def _cached_product_urls(self, items):
+        """Catalog links, overridden by pages this pincode's searches resolved to"""
         try:
-            self._set_location_if_needed()
-            
-            # Load user cookies if available
-            cookies_loaded = self._load_user_cookies()
-            if cookies_loaded:
-                self.driver.refresh()
-                time.sleep(5)
-                logging.info("User cookies loaded successfully")
-            else:
-                logging.warning("No user cookies found, proceeding without authentication")
-            
-            for item in items:
-                try:
-                    self.driver.get("https://www.blinkit.com/")
-                    # Different pages sometimes use different selectors; try multiple
+            from app.product_links import find_product_links
+            from app.product_urls import cached_product_urls
+            urls = find_product_links(items)
+            urls.update(cached_product_urls(items, self.pincode))
+            return urls
+        except Exception as e:
+            # No app context (e.g. a standalone script): always search
+            logging.debug(f"Product URL cache unavailable: {e}")
+            return {}
+
+    def _remember_product_url(self, item, url):
+        try:
+            from app.product_urls import remember_product_url
+            remember_product_url(item, self.pincode, url)
+        except Exception as e:
+            logging.debug(f"Could not cache product URL for {item}: {e}")
+
+    def _forget_product_url(self, item):
+        try:
+            from app.product_urls import forget_product_url
+            forget_product_url(item, self.pincode)
+        except Exception as e:
+            logging.debug(f"Could not drop cached product URL for {item}: {e}")
+
+    def _product_link(self, element):
+        """Product page URL of the card containing ``element``, if it links to one"""
+        if element is None:
+            return None
+        try:
+            links = element.find_elements(By.XPATH, PRODUCT_LINK_XPATH)
+            return links[0].get_attribute("href") if links else None
+        except Exception:
+            return None
+
+    def _add_via_product_page(self, item, url):
+        """Add ``item`` straight from its cached product page; False means search instead"""
+        if not url:
+            return False
+        try:
+            self.driver.get(url)
+            self._record_page_load("product")
+            button = find_element(self.driver, "product_add", timeout=8)
+            self._scroll_into_view(button)
+            self._added_card = self._card_of(button)
+            try:
+                button.click()
+            except Exception:
+                self.driver.execute_script("arguments[0].click();", button)
+            self._confirm_click(button)
+        except Exception as e:
+            logging.info(f"Cached product page for {item} failed ({str(e)[:80]}); searching instead")
+            self._forget_product_url(item)
+            return False
+        # A successful add re-validates the entry
+        self._remember_product_url(item, url)
+        return True
+
+    def _submit_search(self, query, network_capture=False):
+        """Type ``query`` into the search box of the current page and submit it"""
+        # Different pages sometimes use different selectors; all are tried together
+        search_box = find_element(self.driver, "search_box")
+        search_box.clear()
+        search_box.send_keys(query)
+        if network_capture:
+            # Only the responses to this search should be parsed
+            drain_performance_log(self.driver)
+        search_box.submit()
+
+    def _captured_products(self, query, max_results):
+        """Products parsed from the search API response, or [] to fall back to the DOM"""
+        products = capture_products(self.driver, timeout=Config.SELENIUM_TIMEOUT, max_results=max_results)
+        if products:
+            logging.info(f"Read {len(products)} results for '{query}' from the network")
+        else:
+            logging.info(f"No API results captured for '{query}'; using the rendered page")
+        return products
+
+    def _app_loaded(self):
+        """Whether the tab already shows a Blinkit page with the search box (so a search needs no reload)"""
+        try:
+            return bool(BLINKIT_PAGE.match(self.driver.current_url or ""))
+        except Exception:
+            return False
+
+    def _wait_for_results(self, query):
+        """Wait until the page shows the results for ``query`` and they have rendered"""
+        wait_until(
+            lambda: self.driver.execute_script(SEARCH_SHOWN_SCRIPT, query),
+            message=f"Search for '{query}' did not open its results",
+        )
+        try:
+            # The route changes before the new cards come back from the API
+            wait_for_network_idle(self.driver, timeout=3)
+        except Exception:
+            pass
+        wait_until(
+            lambda: self.driver.find_elements(By.XPATH, RESULT_CARDS_XPATH),
+            message="No search results rendered",
+        )
+
+    def _add_via_search(self, item, network_capture=False, in_page=False):
+        """Search for ``item`` and add the first result; returns its product URL if found.
+
+        in_page: search from the app already open in this tab (the SPA routes to
+        the results without a reload); a failed in-page attempt is retried once
+        after a full reload.
+        """
+        if in_page and self._app_loaded():
+            try:
+                return self._search_and_add(item, network_capture, reload=False)
+            except Exception as e:
+                logging.info(f"In-page search for {item} failed ({str(e)[:80]}); reloading")
+        return self._search_and_add(item, network_capture, reload=True)
+
+    def _search_and_add(self, item, network_capture, reload):
+        if reload:
+            self._reloads += 1
+            self.driver.get("https://www.blinkit.com/")
+            self._record_page_load("home")
+        self._submit_search(item, network_capture)
+        if network_capture:
+            # The API response names the product page; skip waiting for the cards to render
+            captured = self._captured_products(item, max_results=1)
+            if captured and captured[0]["url"]:
+                if self._add_via_product_page(item, captured[0]["url"]):
+                    return captured[0]["url"]
+                # That page replaced the results; search again from it
+                self._submit_search(item)
+
+        # Wait for this search's results; selectors may change on Blinkit, so we guard.
+        self._wait_for_results(item)
+        if reload:
+            self._record_page_load("search")
+        # Try common add button patterns with retries
+        added = False
+        link = None
+        last_error = None
+        for attempt in range(3):
+            try:
+                # Prefer first product card's add within card
+                cards = self.wait.until(
+                    EC.presence_of_all_elements_located((By.XPATH, RESULT_CARDS_XPATH))
+                )
+                target = None
+                if cards:
+                    target = cards[0]
                     try:
-                        search_box = self.wait.until(EC.presence_of_element_located((By.NAME, "q")))
-                    except Exception:
-                        search_box = self.wait.until(EC.presence_of_element_located((By.XPATH, "//input[contains(@placeholder,'Search') or contains(@aria-label,'Search')]")))
-                    search_box.clear()
-                    search_box.send_keys(item)
-                    search_box.submit()
-
-                    # Wait for any result; selectors may change on Blinkit, so we guard.
-                    self.wait.until(
-                        EC.any_of(
-                            EC.presence_of_element_located((By.CLASS_NAME, "ProductCard__title")),
-                            EC.presence_of_element_located((By.XPATH, "//div[contains(@class,'Product')]")),
-                        )
-                    )
-                    # Try common add button patterns with retries
-                    added = False
-                    last_error = None
-                    for attempt in range(3):
-                        try:
-                            # Prefer first product card's add within card
-                            cards = self.wait.until(
-                                EC.presence_of_all_elements_located((By.XPATH, "//div[contains(@class,'Product') or contains(@class,'product')][.//button]"))
-                            )
-                            target = None
-                            if cards:
-                                target = cards[0]
-                                try:
-                                    add_in_card = target.find_element(By.XPATH, ".//button[contains(., 'Add') or contains(., '+')]")
-                                    self._scroll_into_view(add_in_card)
-                                    try:
-                                        add_in_card.click()
-                                    except Exception:
-                                        self.driver.execute_script("arguments[0].click();", add_in_card)
-                                    added = True
-                                    break
-                                except Exception as e:
-                                    last_error = e
-                            # Fallback global queries
-                            if not added:
-                                try:
-                                    btn = self.short_wait.until(EC.element_to_be_clickable((By.XPATH, "(//button[contains(., 'Add')])[1]")))
-                                    self._scroll_into_view(btn)
-                                    btn.click()
-                                    added = True
-                                    break
-                                except Exception as e1:
-                                    last_error = e1
-                                try:
-                                    btn2 = self.short_wait.until(EC.element_to_be_clickable((By.XPATH, "(//button[contains(., '+') and not(contains(., '++'))])[1]")))
-                                    self._scroll_into_view(btn2)
-                                    btn2.click()
-                                    added = True
-                                    break
-                                except Exception as e2:
-                                    last_error = e2
-                        except Exception as e3:
-                            last_error = e3
-                        # small wait between attempts
+                        add_in_card = target.find_element(By.XPATH, ".//button[contains(., 'Add') or contains(., '+')]")
+                        # Read the link first: the card may re-render once the item is added
+                        link = self._product_link(target)
+                        self._added_card = target
+                        self._scroll_into_view(add_in_card)
                         try:
-                            self.driver.implicitly_wait(1)
+                            add_in_card.click()
                         except Exception:
-                            pass
+                            self.driver.execute_script("arguments[0].click();", add_in_card)
+                        self._confirm_click(add_in_card)
+                        added = True
+                        break
+                    except Exception as e:
+                        last_error = e
+                # Fallback global queries
+                if not added:
+                    try:
+                        btn = find_element(self.driver, "search_add", timeout=5)
+                        link = self._product_link(btn)
+                        self._added_card = self._card_of(btn)
+                        self._scroll_into_view(btn)
+                        btn.click()
+                        self._confirm_click(btn)
+                        added = True
+                        break
+                    except Exception as e1:
+                        last_error = e1
+            except Exception as e3:
+                last_error = e3
+            # Let late-rendering cards settle before the next attempt
+            try:
+                wait_for_network_idle(self.driver, timeout=2)
+            except Exception:
+                pass
+
+        if not added:
+            raise RuntimeError(f"No add button found/clickable: {last_error}")
+        self._save_debug(f"after_search_{item}")
+        return link
+
+    # Quantities (app/pack_sizes.py) --------------------------------------
+
+    def _cart_request(self, item):
+        """(query, packs) for a plain query or an ``order_item()`` dict with its shortfall"""
+        if not isinstance(item, dict):
+            return item, 1
+        query = item["query"]
+        try:
+            from app.pack_sizes import packs_needed
+            return query, packs_needed(query, item.get("needed"), item.get("unit"), max_packs=Config.MAX_PACKS_PER_ITEM)
+        except Exception as e:
+            logging.debug(f"Pack count unavailable for {query}: {e}")
+            return query, 1
+
+    def _pack_sizes(self, queries):
+        """{query: pack size} for queries the catalog pins to one product size"""
+        try:
+            from app.pack_sizes import exact_pack_size
+            return {query: exact_pack_size(query) for query in queries}
+        except Exception as e:
+            logging.debug(f"Pack sizes unavailable: {e}")
+            return {}
+
+    def _card_of(self, button):
+        """The product card holding ``button`` (its grandparent if no card wraps it), or None"""
+        try:
+            cards = button.find_elements(By.XPATH, ADD_CARD_XPATH)
+            return cards[0] if cards else button.find_element(By.XPATH, "../..")
+        except Exception:
+            return None
+
+    def _card_stepper(self, card):
+        """(increase button, quantity shown) inside ``card``, or None once it is gone"""
+        try:
+            state = self.driver.execute_script(CARD_STEPPER_SCRIPT, card)
+        except Exception:
+            return None
+        return tuple(state) if state else None
+
+    def _add_more_packs(self, item, packs):
+        """Step the just-added item's card up to ``packs``; returns the quantity it shows.
+
+        Only the stepper inside the card the ADD click was on is used, so another
+        product's "+" elsewhere on the page is never touched. The result is what
+        the card reads after the last click (the click count if it shows none).
+        """
+        card = self._added_card
+        in_cart = 1
+        # packs - 1 clicks at most, then one more read of the card
+        for _ in range(packs):
+            stepper = self._card_stepper(card) if card is not None else None
+            if stepper is None:
+                logging.warning(f"Card of {item} is no longer on the page; left at {in_cart} of {packs} packs")
+                break
+            plus, shown = stepper
+            if shown is not None:
+                in_cart = shown
+            if in_cart >= packs:
+                break
+            if plus is None:
+                logging.warning(f"No quantity stepper on the card of {item}; left at {in_cart} of {packs} packs")
+                break
+            before_text = card.text
+            try:
+                plus.click()
+            except Exception:
+                try:
+                    self.driver.execute_script("arguments[0].click();", plus)
+                except Exception as e:
+                    logging.warning(f"Could not add more packs of {item}: {str(e)[:80]}")
+                    break
+            if shown is None:
+                # No count to read; a change in the card's text stands for one more pack
+                if not wait_for_text_change(card, before_text):
+                    logging.warning(f"Quantity of {item} stopped at {in_cart} of {packs} packs")
+                    break
+                in_cart += 1
+                continue
+
+            def grown(before=in_cart):
+                stepper = self._card_stepper(card)
+                return stepper and stepper[1] is not None and stepper[1] > before and stepper[1]
+            try:
+                in_cart = wait_until(grown, timeout=5, poll=0.1)
+            except TimeoutException:
+                # Blinkit caps per-item quantities; the count stops moving there
+                logging.warning(f"Quantity of {item} stopped at {in_cart} of {packs} packs")
+                break
+        return in_cart
+
+    # Checkpoints (app/bot_runs.py) ---------------------------------------
+
+    def _checkpoint(self, run, query, packs, message):
+        """Persist one item's outcome on ``run`` so a crashed pass can resume after it"""
+        if run is None:
+            return
+        try:
+            from app.bot_runs import checkpoint_item
+            checkpoint_item(run, query, message, packs=packs, url=self.item_urls.get(query))
+        except Exception as e:
+            logging.warning(f"Could not checkpoint {query}: {e}")
 
-                    self._save_debug(f"after_search_{item}")
-                    if not added:
-                        raise RuntimeError(f"No add button found/clickable: {last_error}")
+    def _resume_from_run(self, run, requests, known_urls, progress):
+        """Result messages for requests the interrupted pass of ``run`` already added.
 
-                    results.append(f"✅ {item} added to cart.")
-                except Exception as item_error:
-                    logging.error(f"Error processing {item}: {item_error}")
-                    snap = self._save_debug(f"error_{item}")
-                    results.append(f"❌ Failed to add {item}: {str(item_error)[:120]} (see {snap})")
+        Returns {request index: message}. Failed items keep the product page
+        that pass resolved, in ``known_urls``.
+        """
+        settled = {}
+        checkpoints = run.get_items()
+        for index, (query, packs) in enumerate(requests):
+            done = checkpoints.get(query)
+            if not done:
+                continue
+            if done.get("status") == "added" and done.get("packs", 1) >= packs:
+                settled[index] = f"✅ {query} was added by an earlier attempt (run #{run.id})."
+                if progress:
+                    progress(settled[index])
+            elif done.get("url"):
+                known_urls.setdefault(query, done["url"])
+        if settled:
+            logging.info(f"Resumed run {run.id}: {len(settled)} of {len(requests)} items were already added")
+        return settled
+
+    def _settle_from_cart(self, requests, progress, skip=()):
+        """Result messages for requests the cart already holds, topping up short lines there.
+
+        Returns {request index: message}; requests at ``skip`` indexes are left
+        alone, and the rest still need adding.
+        """
+        self._prepare_session()
+        lines = read_cart(self.driver)
+        delta = cart_delta(requests, lines, self._pack_sizes([query for query, _ in requests]))
+        settled = {}
+        for index, ((query, packs), (line, to_add)) in enumerate(zip(requests, delta)):
+            if line is None or index in skip:
+                continue
+            started = time.monotonic()
+            self._reloads = 0
+            if to_add:
+                reached = top_up(self.driver, line, packs)
+                counted = f"topped up to {packs} packs" if reached >= packs else f"{reached} of {packs} packs"
+                message = f"✅ {query} was already in the cart; {counted}."
+            else:
+                message = f"✅ {query} is already in the cart."
+            self._record_item_timing(query, "cart", started, True, packs)
+            settled[index] = message
+            if progress:
+                progress(message)
+        if settled:
+            logging.info(f"{len(settled)} of {len(requests)} items were already in the cart")
+        return settled
+
+    def _prepare_session(self):
+        """Cookies and delivery location, once per bot"""
+        if self._session_ready:
+            return
+        # Load user cookies if available
+        if self._load_user_cookies():
+            logging.info("User cookies loaded successfully")
+        else:
+            logging.warning("No user cookies found, proceeding without authentication")
+        self._set_location_if_needed()
+        self._session_ready = True
+
+    def _add_item(self, item, known_url, network_capture, in_page, packs=1):
+        """Add ``packs`` of one item (product page first, then search); returns its result message"""
+        started = time.monotonic()
+        self._reloads = 0
+        self._added_card = None
+        via = "product page"
+        try:
+            self._prepare_session()
+            url = known_url
+            if not self._add_via_product_page(item, known_url):
+                via = "search"
+                url = self._add_via_search(item, network_capture, in_page)
+                if url:
+                    self._remember_product_url(item, url)
+            if url:
+                self.item_urls[item] = url
+            if packs > 1:
+                # The ADD button is now this item's stepper, so no further navigation is needed
+                in_cart = self._add_more_packs(item, packs)
+                counted = f"{packs} packs" if in_cart >= packs else f"{in_cart} of {packs} packs"
+                message = f"✅ {item} added to cart ({counted})."
+            else:
+                message = f"✅ {item} added to cart."
+        except Exception as item_error:
+            logging.error(f"Error processing {item}: {item_error}")
+            snap = self._save_debug(f"error_{item}", failure=True)
+            message = f"❌ Failed to add {item}: {str(item_error)[:120]}" + (f" (see {snap})" if snap else "")
+        self._record_item_timing(item, via, started, message.startswith("✅"), packs)
+        return message
+
+    def _helper_bot(self):
+        """Another pooled session for this user, for parallel cart filling"""
+        return GreenShelfBot(
+            self.upi_id, user_id=self.user_id, headless=self.headless, pool=self.pool, lean=self.lean,
+            debug_tags=self.debug_tags, pincode=self.pincode, slot_timeout=Config.CART_PARALLEL_SLOT_TIMEOUT,
+        )
+
+    def _add_items_in_parallel(self, requests, sessions, known_urls, network_capture, in_page, progress,
+                               on_item=None):
+        """Fill the cart with this bot plus ``sessions - 1`` helpers, then confirm against the cart"""
+        helpers = borrow_sessions(self._helper_bot, min(sessions, len(requests)) - 1)
+        for helper in helpers:
+            # Shared, so checkpoints written on this thread see every session's URLs
+            helper.item_urls = self.item_urls
+        try:
+            results = run_parallel(
+                requests, [self] + helpers,
+                lambda bot, request: bot._add_item(
+                    request[0], known_urls.get(request[0]), network_capture, in_page, packs=request[1]
+                ),
+                on_result=progress,
+                on_item=on_item,
+            )
+        finally:
+            for helper in helpers:
+                self.item_timings.extend(helper.item_timings)
+                helper.cleanup()
+        if not helpers:
+            return results
+        reconciled = reconcile_cart([query for query, _ in requests], results, read_cart_lines(self.driver))
+        for request, before, after in zip(requests, results, reconciled):
+            if after != before:
+                if on_item:
+                    on_item(request, after)
+                if progress:
+                    progress(after)
+        return reconciled
+
+    def process_items(self, items, keep_browser: bool = False, progress=None, network_capture=None, in_page=None,
+                      sessions=None, cart_diff=None, run=None):
+        """Add items to cart.
+
+        items: Blinkit queries, or ``app.ordering.order_item()`` dicts whose
+        shortfall (needed, unit) sets how many packs are added.
+        keep_browser: when True, do not quit the browser at the end so caller can proceed to checkout.
+        progress: optional callable given each item's result message as soon as it is known.
+        network_capture: resolve search results from API responses (defaults to Config.NETWORK_CAPTURE).
+        in_page: search each item from the page already open instead of reloading the
+        home page (defaults to Config.IN_PAGE_SEARCH). Per-item timings end up in
+        ``self.item_timings``.
+        sessions: browsers adding items at once (defaults to Config.CART_PARALLEL_SESSIONS);
+        with more than one, the cart is read back to confirm every line.
+        cart_diff: read the cart first and only add what it is missing (defaults to
+        Config.CART_DIFF), so a retried order is close to a no-op.
+        run: app.models.BotRun to checkpoint each item on; items an earlier,
+        interrupted pass of it already added are skipped.
+        """
+        if network_capture is None:
+            network_capture = Config.NETWORK_CAPTURE
+        if in_page is None:
+            in_page = Config.IN_PAGE_SEARCH
+        if sessions is None:
+            sessions = Config.CART_PARALLEL_SESSIONS
+        if cart_diff is None:
+            cart_diff = Config.CART_DIFF
+        results = []
+        filling_started = time.monotonic()
+
+        def checkpoint(request, message):
+            self._checkpoint(run, request[0], request[1], message)
+
+        try:
+            requests = [self._cart_request(item) for item in items]
+            # Known product pages let these items skip the search step
+            known_urls = self._cached_product_urls([query for query, _ in requests])
+            settled = self._resume_from_run(run, requests, known_urls, progress) if run is not None else {}
+            if cart_diff and len(settled) < len(requests):
+                in_cart = self._settle_from_cart(requests, progress, skip=settled)
+                for index, message in in_cart.items():
+                    checkpoint(requests[index], message)
+                settled.update(in_cart)
+            to_add = [request for index, request in enumerate(requests) if index not in settled]
+            added = []
+            if sessions > 1 and len(to_add) > 1:
+                added = self._add_items_in_parallel(
+                    to_add, sessions, known_urls, network_capture, in_page, progress, on_item=checkpoint
+                )
+            else:
+                for request in to_add:
+                    query, packs = request
+                    added.append(self._add_item(query, known_urls.get(query), network_capture, in_page, packs))
+                    checkpoint(request, added[-1])
+                    if progress:
+                        progress(added[-1])
+            # Back in the caller's order
+            added = iter(added)
+            results = [settled[index] if index in settled else next(added) for index in range(len(requests))]
+            if self.item_timings:
+                total = time.monotonic() - filling_started
+                logging.info(
+                    f"Filled cart with {len(items)} items in {total:.1f}s "
+                    f"({total / len(items):.1f}s/item, in-page search {'on' if in_page else 'off'}, "
+                    f"up to {max(1, sessions)} sessions)"
+                )
         finally:
             # Only cleanup the browser if caller did not request to keep it open
             if not keep_browser:
@@ -266,20 +785,19 @@ class GreenShelfBot:
             self.driver.get("https://www.blinkit.com/cart")
             # Proceed to checkout
             try:
-                self._safe_click((By.XPATH, "//button[contains(., 'Checkout') or contains(., 'Proceed') or contains(., 'Continue')]"))
+                self._safe_click("cart_checkout")
             except Exception:
                 pass
 
             # Select UPI payment method
             try:
-                self.wait.until(EC.presence_of_element_located((By.XPATH, "//*[contains(., 'UPI') and (self::button or self::div or self::span)]")))
-                self._safe_click((By.XPATH, "//*[contains(., 'UPI') and (self::button or self::div or self::span)][1]"))
+                self._safe_click("upi_option")
             except Exception:
                 msgs.append("Could not automatically select UPI; please choose it manually.")
 
             # Enter or confirm UPI ID if required
             try:
-                upi_input = self.short_wait.until(EC.presence_of_element_located((By.XPATH, "//input[contains(@placeholder,'UPI') or contains(@aria-label,'UPI') or contains(@name,'upi')]")))
+                upi_input = find_element(self.driver, "upi_input", timeout=5)
                 upi_input.clear()
                 upi_input.send_keys(upi_id)
             except Exception:
@@ -287,36 +805,38 @@ class GreenShelfBot:
 
             # Attempt to trigger the payment request
             try:
-                self._safe_click((By.XPATH, "//button[contains(., 'Pay') or contains(., 'Continue') or contains(., 'Proceed')][1]"))
+                self._safe_click("pay_button")
                 msgs.append("Attempted to trigger UPI request. Check your UPI app to approve.")
             except Exception as e:
                 msgs.append(f"Could not trigger payment automatically: {e}")
 
             snap = self._save_debug("checkout")
-            msgs.append(f"Saved checkout screenshot: {snap}")
+            if snap:
+                msgs.append(f"Saved checkout screenshot: {snap}")
         except Exception as e:
             msgs.append(f"Checkout flow error: {e}")
         return msgs
 
-    def search_products(self, query: str, max_results: int = 8):
+    def search_products(self, query: str, max_results: int = 8, network_capture=None):
+        """Search Blinkit and return up to ``max_results`` product dicts.
+
+        network_capture: read results from the search API response instead of the
+        rendered cards, falling back to the DOM (defaults to Config.NETWORK_CAPTURE).
+        """
+        if network_capture is None:
+            network_capture = Config.NETWORK_CAPTURE
         products = []
         try:
+            # Load user cookies if available
+            self._load_user_cookies()
             self._set_location_if_needed()
             self.driver.get("https://www.blinkit.com/")
-            
-            # Load user cookies if available
-            cookies_loaded = self._load_user_cookies()
-            if cookies_loaded:
-                self.driver.refresh()
-                time.sleep(3)
-            
-            try:
-                search_box = self.wait.until(EC.presence_of_element_located((By.NAME, "q")))
-            except Exception:
-                search_box = self.wait.until(EC.presence_of_element_located((By.XPATH, "//input[contains(@placeholder,'Search') or contains(@aria-label,'Search')]")))
-            search_box.clear()
-            search_box.send_keys(query)
-            search_box.submit()
+
+            self._submit_search(query, network_capture)
+            if network_capture:
+                products = self._captured_products(query, max_results)
+                if products:
+                    return products
 
             # Wait for product cards to appear
             self.wait.until(
@@ -326,43 +846,23 @@ class GreenShelfBot:
                 )
             )
 
-            cards = self.driver.find_elements(By.XPATH, "//div[contains(@class,'Product') or contains(@class,'product')]")
-            for card in cards:
-                if len(products) >= max_results:
-                    break
-                try:
-                    name_elem = None
-                    img_elem = None
-                    # Try common structures
-                    try:
-                        name_elem = card.find_element(By.XPATH, ".//*[contains(@class,'title') or contains(@class,'name') or self::h3 or self::h2]")
-                    except Exception:
-                        pass
-                    try:
-                        img_elem = card.find_element(By.XPATH, ".//img")
-                    except Exception:
-                        pass
-                    name = (name_elem.text or "").strip() if name_elem else ""
-                    img = img_elem.get_attribute("src") if img_elem else ""
-                    if name:
-                        products.append({
-                            "name": name,
-                            "image": img,
-                        })
-                except Exception:
-                    continue
+            self._record_page_load("search")
+            # One script pulls every card instead of several round-trips per card
+            products = self.driver.execute_script(SEARCH_CARDS_SCRIPT, max_results) or []
         finally:
             self.cleanup()
         return products
     
-    def cleanup(self):
-        """Safely cleanup the Chrome driver and resources"""
-        try:
-            if hasattr(self, 'driver') and self.driver:
-                self.driver.quit()
-                self.driver = None
-        except Exception as e:
-            logging.warning(f"Error during cleanup: {e}")
+    def cleanup(self, healthy=True):
+        """Hand the browser back to the pool (retiring it if ``healthy`` is False)"""
+        pooled = getattr(self, '_pooled', None)
+        self._pooled = None
+        self.driver = None
+        if pooled is not None:
+            try:
+                self.pool.checkin(pooled, healthy=healthy)
+            except Exception as e:
+                logging.warning(f"Error during cleanup: {e}")
     
     def __del__(self):
         """Destructor to ensure cleanup"""
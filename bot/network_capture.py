@@ -0,0 +1,166 @@
+"""Product listings read from Blinkit's own JSON API responses.
+
+Search results reach the browser as JSON before the page renders them, so
+with ``NETWORK_CAPTURE`` on, drivers start with Chrome's performance log and
+the bot reads product data from matching responses (``Network.getResponseBody``)
+instead of waiting for and scraping the rendered cards. Callers fall back to
+the DOM whenever nothing usable is captured, as soon as the matching responses
+turn out to hold no products.
+
+A product's page URL is only emitted when the response names it or carries a
+product id (``product_id``/``prid``); a bare ``id`` is too often a listing,
+widget or variant id to build a /prn/ link from.
+"""
+
+import base64
+import json
+import logging
+import re
+from urllib.parse import urljoin
+
+from selenium.common.exceptions import TimeoutException
+
+from bot.waits import wait_until
+from config import Config
+
+NAME_KEYS = ("name", "product_name", "display_name")
+PRICE_KEYS = ("price", "offer_price", "mrp", "normal_price")
+ID_KEYS = ("product_id", "prid")
+URL_KEYS = ("product_url", "web_url", "url")
+IMAGE_KEYS = ("image_url", "image", "thumbnail", "thumb_url")
+SIZE_KEYS = ("unit", "pack_size", "quantity", "weight")
+
+
+def drain_performance_log(driver):
+    """Discard buffered performance events (chromedriver keeps them until read)"""
+    try:
+        driver.get_log("performance")
+    except Exception:
+        pass
+
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def _first(data, keys):
+    for key in keys:
+        value = data.get(key)
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+def _product_url(data, name):
+    """The product page the response names, else one built from its product id; None if neither"""
+    url = _first(data, URL_KEYS)
+    if isinstance(url, str) and "/prn/" in url and url.startswith(("https://", "http://", "/")):
+        return urljoin(Config.BLINKIT_BASE_URL, url)
+    product_id = _first(data, ID_KEYS)
+    if isinstance(product_id, (int, str)) and not isinstance(product_id, bool) and str(product_id).strip():
+        return f"https://blinkit.com/prn/{_slug(name)}/prid/{str(product_id).strip()}"
+    return None
+
+
+def _as_product(data):
+    """Normalize a product-looking JSON object, or None if it isn't one"""
+    name = _first(data, NAME_KEYS)
+    price = _first(data, PRICE_KEYS)
+    if not isinstance(name, str) or price is None:
+        return None
+    if isinstance(price, dict):
+        price = _first(price, ("value", "amount", "price"))
+    try:
+        price = float(str(price).replace("₹", "").replace(",", "").strip())
+    except (TypeError, ValueError):
+        return None
+    image = _first(data, IMAGE_KEYS) or (data.get("images") or [None])[0]
+    if isinstance(image, dict):
+        image = _first(image, ("url", "image_url", "src"))
+    size = _first(data, SIZE_KEYS)
+    url = _product_url(data, name)
+    if not (url or isinstance(image, str) or size is not None):
+        # A name and a price alone also describe filters and offers
+        return None
+    return {
+        "name": name.strip(),
+        "image": image if isinstance(image, str) else "",
+        "price": price,
+        "size": str(size) if size is not None else None,
+        "url": url,
+    }
+
+
+def find_products(payload, limit=None):
+    """Walk a JSON payload and collect product objects in document order"""
+    products, seen, stack = [], set(), [payload]
+    while stack and (limit is None or len(products) < limit):
+        node = stack.pop()
+        if isinstance(node, dict):
+            product = _as_product(node)
+            if product:
+                key = product["url"] or (product["name"], product["price"], product["size"])
+                if key not in seen:
+                    seen.add(key)
+                    products.append(product)
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return products
+
+
+def _response_text(body):
+    """Text of a Network.getResponseBody result (Chrome base64-encodes some bodies)"""
+    text = body.get("body") or ""
+    if body.get("base64Encoded"):
+        text = base64.b64decode(text).decode("utf-8", errors="replace")
+    return text
+
+
+def capture_products(driver, url_pattern=None, timeout=None, max_results=8):
+    """Products from API responses logged since the last drain.
+
+    Returns [] as soon as every matching response has been read without
+    yielding a product, or when none turns up in time. Call
+    ``drain_performance_log()`` right before triggering the search so only its
+    responses are considered.
+    """
+    pattern = re.compile(url_pattern or Config.NETWORK_CAPTURE_URL_PATTERN)
+    pending = {}  # requestId -> url, for JSON responses whose body isn't ready yet
+    products = []
+    read = []  # urls of matching responses already parsed
+
+    def collect():
+        try:
+            entries = driver.get_log("performance")
+        except Exception as e:
+            # Driver started without performance logging
+            logging.debug(f"Performance log unavailable: {e}")
+            raise TimeoutException("performance log unavailable")
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            if message.get("method") != "Network.responseReceived":
+                continue
+            response = message["params"]["response"]
+            if pattern.search(response.get("url", "")) and "json" in response.get("mimeType", ""):
+                pending[message["params"]["requestId"]] = response["url"]
+        for request_id, url in list(pending.items()):
+            try:
+                body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            except Exception:
+                continue  # Still loading; try again on the next poll
+            del pending[request_id]
+            read.append(url)
+            try:
+                products.extend(find_products(json.loads(_response_text(body) or "null"), max_results))
+            except ValueError:
+                logging.debug(f"Non-JSON body from {url}")
+        # A search answered with no products won't gain any by waiting
+        return len(products) > 0 or (read and not pending)
+
+    try:
+        wait_until(collect, timeout, poll=0.2)
+    except TimeoutException:
+        return []
+    return products[:max_results]
@@ -0,0 +1,120 @@
+"""Adding an order's items through several browser sessions at once.
+
+Items in one order don't depend on each other, so with
+``CART_PARALLEL_SESSIONS`` above 1 the bot and the grocery flow borrow extra
+pooled drivers for the same user (each gets the user's cookies, so they all
+fill the same Blinkit cart) and work through a shared queue of items. A
+WebDriver session only runs one command at a time, so the sessions are
+separate drivers rather than tabs of one driver.
+
+Extra sessions are best effort: one that can't get a pool slot within
+``CART_PARALLEL_SLOT_TIMEOUT`` seconds is skipped and the others take its
+items. Because concurrent adds can race on the server-side cart, the cart is
+read back afterwards and every line reported as added is confirmed against it
+(``reconcile_cart``).
+"""
+
+import logging
+import threading
+from contextlib import nullcontext
+from queue import Queue, Empty
+
+from config import Config
+from bot.cart_state import CART_URL, in_cart, snapshot_lines
+
+
+def _current_app():
+    """The Flask app of the calling thread, so workers can query the DB too"""
+    try:
+        from flask import current_app
+        return current_app._get_current_object()
+    except Exception:
+        return None
+
+
+def run_parallel(items, sessions, add_item, on_result=None, on_item=None):
+    """Run ``add_item(session, item) -> message`` over ``items`` with one thread per session.
+
+    Messages come back in item order; ``on_result(message)`` and
+    ``on_item(item, message)`` are called on the calling thread as each one
+    arrives, so they may touch the caller's DB session.
+    """
+    app = _current_app()
+    pending = Queue()
+    for index, item in enumerate(items):
+        pending.put((index, item))
+    finished = Queue()
+
+    def work(session):
+        with app.app_context() if app is not None else nullcontext():
+            while True:
+                try:
+                    index, item = pending.get_nowait()
+                except Empty:
+                    return
+                try:
+                    message = add_item(session, item)
+                except Exception as e:
+                    logging.error(f"Error processing {item}: {e}")
+                    message = f"❌ Failed to add {item}: {str(e)[:120]}"
+                finished.put((index, message))
+
+    threads = [
+        threading.Thread(target=work, args=(session,), name=f"cart-session-{n}", daemon=True)
+        for n, session in enumerate(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    messages = [None] * len(items)
+    for _ in items:
+        index, message = finished.get()
+        messages[index] = message
+        if on_item:
+            on_item(items[index], message)
+        if on_result:
+            on_result(message)
+    for thread in threads:
+        thread.join()
+    return messages
+
+
+def borrow_sessions(open_session, count):
+    """Up to ``count`` extra sessions from ``open_session()``; stops at the first that fails"""
+    sessions = []
+    for _ in range(max(0, count)):
+        try:
+            sessions.append(open_session())
+        except Exception as e:
+            logging.info(f"Adding items with {len(sessions) + 1} sessions; no more pool slots ({e})")
+            break
+    return sessions
+
+
+def read_cart_lines(driver):
+    """Lower-cased text of each line in the Blinkit cart, or None if it couldn't be read"""
+    try:
+        from bot.waits import wait_until
+        driver.get(CART_URL)
+        lines = wait_until(lambda: snapshot_lines(driver), timeout=Config.SELENIUM_TIMEOUT)
+        return [line.text for line in lines]
+    except Exception as e:
+        logging.warning(f"Could not read the cart back: {e}")
+        return None
+
+
+def reconcile_cart(items, messages, cart_lines):
+    """Downgrade "added" messages for items missing from ``cart_lines``.
+
+    Returns the reconciled messages (same order); with ``cart_lines`` None the
+    cart couldn't be read and the messages are returned unchanged.
+    """
+    if cart_lines is None:
+        return list(messages)
+    reconciled = []
+    for item, message in zip(items, messages):
+        if message.startswith("✅") and not in_cart(item, cart_lines):
+            message = f"⚠️ {item} was added but is not in the cart; please check it"
+        reconciled.append(message)
+    confirmed = sum(1 for message in reconciled if message.startswith("✅"))
+    logging.info(f"Cart reconciled: {confirmed}/{len(items)} items confirmed")
+    return reconciled
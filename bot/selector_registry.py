@@ -0,0 +1,260 @@
+"""Blinkit selectors, tried in order of recent success.
+
+Every UI target the flows click (ADD buttons, cart icon, checkout, UPI form)
+has a named list of candidate locators in ``SELECTORS``. ``find_element()``
+checks all candidates for a target in one script call per poll, takes the
+first visible, enabled match in ranked order and records the outcome:
+
+- the winner gets a hit and its latency;
+- every candidate ranked above it gets a miss, since it was checked and
+  didn't match.
+
+Candidates are ranked by an exponentially weighted hit rate, so a selector
+that starts failing after a Blinkit redesign sinks below its replacement after a
+few runs. Stats persist to ``data/selector_stats.json`` so a restart keeps the
+learned order.
+"""
+
+import atexit
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from threading import Lock
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+
+from bot.waits import wait_until
+
+STATS_FILE = Path(__file__).resolve().parents[1] / "data" / "selector_stats.json"
+# Weight of the latest outcome in a candidate's success score
+DECAY = 0.3
+SAVE_INTERVAL_SECONDS = 60
+
+SELECTORS = {
+    "search_box": [
+        (By.CSS_SELECTOR, "input[name='q']"),
+        (By.XPATH, "//input[contains(@placeholder,'Search') or contains(@aria-label,'Search')]"),
+    ],
+    "location_open": [
+        (By.XPATH, "//button[contains(., 'Select location') or contains(., 'Deliver to') or contains(., 'Change')][1]"),
+    ],
+    "pincode_input": [
+        (By.XPATH, "//input[@type='text' and (contains(@placeholder,'pin') or contains(@placeholder,'Pin'))]"),
+    ],
+    "location_apply": [
+        (By.XPATH, "//button[contains(., 'Apply') or contains(., 'Save') or contains(., 'Confirm')]"),
+    ],
+    # ADD button on a single product page (/prn/...)
+    "product_add": [
+        (By.XPATH, '//button[contains(@class, "tw-bg-green-050") and contains(text(), "ADD")]'),
+        (By.XPATH, '//button[contains(@class, "tw-border-base-green") and contains(text(), "ADD")]'),
+        (By.XPATH, '//div[@role="button" and contains(text(), "ADD")]'),
+        (By.XPATH, '//button[contains(text(), "Add to cart")]'),
+        (By.XPATH, '//div[@data-pf="reset" and contains(text(), "Add to cart")]'),
+    ],
+    # First ADD button anywhere on a search results page
+    "search_add": [
+        (By.XPATH, "(//button[contains(., 'Add')])[1]"),
+        (By.XPATH, "(//button[contains(., '+') and not(contains(., '++'))])[1]"),
+    ],
+    "cart_icon": [
+        (By.CLASS_NAME, "CartButton__CartIcon-sc-1fuy2nj-6"),
+        (By.XPATH, "//div[contains(@class, 'CartButton__CartIcon')]"),
+        (By.XPATH, "//*[contains(@class, 'cart-icon')]"),
+        (By.XPATH, "//button[contains(@class, 'cart')]"),
+    ],
+    # "Proceed To Pay" strip on the cart
+    "checkout": [
+        (By.XPATH, '//div[contains(text(), "Proceed To Pay") and contains(@class, "CheckoutStrip__CTAText-sc-1fzbdhy-13")]'),
+        (By.XPATH, '//button[contains(text(), "Proceed") and contains(text(), "Pay")]'),
+        (By.XPATH, '//div[contains(text(), "Proceed To Pay")]'),
+        (By.XPATH, '//*[contains(@class, "checkout") and contains(text(), "Pay")]'),
+        (By.CLASS_NAME, "CheckoutStrip__Icon-sc-1fzbdhy-15 ffuOGj"),
+    ],
+    # Generic checkout button on the /cart page
+    "cart_checkout": [
+        (By.XPATH, "//button[contains(., 'Checkout') or contains(., 'Proceed') or contains(., 'Continue')]"),
+    ],
+    "upi_option": [
+        (By.XPATH, "//*[contains(., 'UPI') and (self::button or self::div or self::span)][1]"),
+    ],
+    # Pay with a UPI ID Blinkit already knows
+    "upi_pay_now": [
+        (By.XPATH, '//div[contains(@class, "Zpayments__Button-sc-127gezb-3") and contains(text(), "Pay Now")]'),
+    ],
+    # Any button that sends the payment request
+    "pay_button": [
+        (By.XPATH, "//button[contains(., 'Pay') or contains(., 'Continue') or contains(., 'Proceed')][1]"),
+    ],
+    "upi_add_new": [
+        (By.XPATH, '//h5[contains(text(), "Add new UPI ID")]'),
+    ],
+    "upi_input": [
+        (By.XPATH, '//input[@type="text" and contains(@class, "bbrwhB")]'),
+        (By.XPATH, "//input[contains(@placeholder,'UPI') or contains(@aria-label,'UPI') or contains(@name,'upi')]"),
+    ],
+    "upi_confirm": [
+        (By.XPATH, '//span[contains(text(), "Checkout")]'),
+    ],
+}
+
+# Returns [index, element] for the first candidate (in the given order) with a
+# visible, enabled match, or null
+PROBE_SCRIPT = """
+const candidates = arguments[0];
+const usable = el => el && !el.disabled && el.getClientRects().length > 0;
+for (let i = 0; i < candidates.length; i++) {
+    const [by, value] = candidates[i];
+    let found = [];
+    try {
+        if (by === 'xpath') {
+            const snap = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (let j = 0; j < snap.snapshotLength; j++) found.push(snap.snapshotItem(j));
+        } else if (by === 'class name') {
+            found = Array.from(document.getElementsByClassName(value));
+        } else {
+            found = Array.from(document.querySelectorAll(value));
+        }
+    } catch (e) { continue; }
+    const el = found.find(usable);
+    if (el) return [i, el];
+}
+return null;
+"""
+
+
+class SelectorRegistry:
+    """Named candidate lists plus per-candidate hit/miss/latency stats"""
+
+    def __init__(self, selectors=None, stats_file=STATS_FILE):
+        self.selectors = selectors or SELECTORS
+        self.stats_file = stats_file
+        self._stats = None  # "name|by|value" -> {"score", "hits", "misses", "total_ms"}
+        self._saved_at = 0.0
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(name, locator):
+        return f"{name}|{locator[0]}|{locator[1]}"
+
+    def _load(self):
+        if self._stats is not None:
+            return
+        self._stats = {}
+        if self.stats_file and Path(self.stats_file).exists():
+            try:
+                with open(self.stats_file, "r", encoding="utf-8") as f:
+                    self._stats = json.load(f)
+            except Exception as e:
+                logging.warning(f"Ignoring unreadable selector stats: {e}")
+
+    def _save(self, force=False):
+        if not self.stats_file or (not force and time.monotonic() - self._saved_at < SAVE_INTERVAL_SECONDS):
+            return
+        self._saved_at = time.monotonic()
+        try:
+            path = Path(self.stats_file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._stats, f, indent=1)
+            os.replace(tmp, path)
+        except Exception as e:
+            logging.debug(f"Could not save selector stats: {e}")
+
+    def ranked(self, name):
+        """Candidates for ``name``, best recent success first (ties keep list order)"""
+        candidates = self.selectors[name]
+        with self._lock:
+            self._load()
+            scores = [self._stats.get(self._key(name, c), {}).get("score", 0.5) for c in candidates]
+        order = sorted(range(len(candidates)), key=lambda i: -scores[i])
+        return [candidates[i] for i in order]
+
+    def record(self, name, winner, tried_before, elapsed_ms):
+        """Credit ``winner`` (may be None) and penalize candidates tried ahead of it"""
+        with self._lock:
+            self._load()
+            outcomes = [(locator, False) for locator in tried_before]
+            if winner is not None:
+                outcomes.append((winner, True))
+            for locator, hit in outcomes:
+                entry = self._stats.setdefault(
+                    self._key(name, locator), {"score": 0.5, "hits": 0, "misses": 0, "total_ms": 0.0}
+                )
+                entry["score"] = (1 - DECAY) * entry["score"] + DECAY * (1.0 if hit else 0.0)
+                if hit:
+                    entry["hits"] += 1
+                    entry["total_ms"] += elapsed_ms
+                else:
+                    entry["misses"] += 1
+            self._save()
+
+    def find_first(self, driver, names, timeout=None):
+        """(name, element) for whichever of the ``names`` targets shows up first.
+
+        Targets are probed together, earlier names winning ties, so alternative
+        page states (e.g. "pay with saved UPI" vs "add a UPI ID") cost one wait.
+        Raises TimeoutException if none turns up.
+        """
+        ranked = {name: self.ranked(name) for name in names}
+        labelled = [(name, locator) for name in names for locator in ranked[name]]
+        payload = [[by, value] for _, (by, value) in labelled]
+        started = time.monotonic()
+        try:
+            index, element = wait_until(
+                lambda: driver.execute_script(PROBE_SCRIPT, payload),
+                timeout, poll=0.2, message=f"No selector matched for {', '.join(names)}",
+            )
+        except TimeoutException:
+            for name in names:
+                self.record(name, None, ranked[name], 0)
+            raise
+        name, winner = labelled[index]
+        candidates = ranked[name]
+        self.record(name, winner, candidates[:candidates.index(winner)], (time.monotonic() - started) * 1000)
+        return name, element
+
+    def find(self, driver, name, timeout=None):
+        """First usable element for ``name``; raises TimeoutException if none turns up"""
+        return self.find_first(driver, [name], timeout)[1]
+
+    def stats(self, name=None):
+        """{name: [{"selector", "score", "hits", "misses", "avg_ms"}, ...]} in ranked order"""
+        report = {}
+        for target in ([name] if name else self.selectors):
+            rows = []
+            for locator in self.ranked(target):
+                entry = self._stats.get(self._key(target, locator), {})
+                hits = entry.get("hits", 0)
+                rows.append({
+                    "selector": f"{locator[0]}={locator[1]}",
+                    "score": round(entry.get("score", 0.5), 3),
+                    "hits": hits,
+                    "misses": entry.get("misses", 0),
+                    "avg_ms": round(entry["total_ms"] / hits) if hits else None,
+                })
+            report[target] = rows
+        return report
+
+    def flush(self):
+        with self._lock:
+            if self._stats is not None:
+                self._save(force=True)
+
+
+selector_registry = SelectorRegistry()
+atexit.register(selector_registry.flush)
+
+
+def find_element(driver, name, timeout=None):
+    """Shortcut for ``selector_registry.find()``"""
+    return selector_registry.find(driver, name, timeout)
+
+
+def find_first(driver, names, timeout=None):
+    """Shortcut for ``selector_registry.find_first()``"""
+    return selector_registry.find_first(driver, names, timeout)
@@ -0,0 +1,48 @@
+"""Pack sizes written in product names and queries ("500 ml", "1kg", "6 pcs")."""
+
+import re
+
+# unit -> (dimension, factor to the dimension's base unit)
+UNITS = {
+    "ml": ("volume", 1), "l": ("volume", 1000), "ltr": ("volume", 1000), "litre": ("volume", 1000),
+    "liter": ("volume", 1000),
+    "g": ("mass", 1), "gm": ("mass", 1), "gms": ("mass", 1), "kg": ("mass", 1000),
+    "pc": ("count", 1), "pcs": ("count", 1), "piece": ("count", 1), "pieces": ("count", 1),
+    "pack": ("count", 1), "packs": ("count", 1), "unit": ("count", 1), "units": ("count", 1),
+}
+
+SIZE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*([a-z]+)")
+
+
+def parse_amount(amount, unit):
+    """(dimension, amount in base units) or None if ``unit`` isn't known"""
+    known = UNITS.get((unit or "").strip().lower())
+    if known is None or amount is None:
+        return None
+    return known[0], float(amount) * known[1]
+
+
+def parse_size(size):
+    """(dimension, amount in base units) for the first size in text like "500 ml", or None"""
+    for match in SIZE_PATTERN.finditer((size or "").lower()):
+        parsed = parse_amount(match.group(1), match.group(2))
+        if parsed:
+            return parsed
+    return None
+
+
+def all_sizes(text):
+    """Every (dimension, base amount) written in ``text``"""
+    found = (parse_amount(m.group(1), m.group(2)) for m in SIZE_PATTERN.finditer((text or "").lower()))
+    return [size for size in found if size]
+
+
+def strip_sizes(text):
+    """``text`` lower-cased with its sizes blanked out, leaving the product words"""
+    return SIZE_PATTERN.sub(
+        lambda m: " " if parse_amount(m.group(1), m.group(2)) else m.group(0), (text or "").lower()
+    )
+
+
+def same_size(a, b):
+    return a[0] == b[0] and abs(a[1] - b[1]) < 1e-6
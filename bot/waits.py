@@ -0,0 +1,154 @@
+"""Condition-based waits for the Blinkit flows.
+
+Use these instead of ``time.sleep()``: each one returns as soon as the page is
+actually ready (DOM loaded, network quiet, element clickable, click applied)
+and raises ``TimeoutException`` once its deadline passes.
+"""
+
+import re
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from config import Config
+
+# Latest finished resource vs. the page clock; the network is idle once nothing
+# has completed for ``quiet_ms``
+NETWORK_ACTIVITY_SCRIPT = """
+const entries = performance.getEntriesByType('resource');
+let last = 0;
+for (const entry of entries) { last = Math.max(last, entry.responseEnd); }
+return [performance.now(), last];
+"""
+
+# What a finished Blinkit payment looks like: an order page or a confirmation message
+PAYMENT_DONE_URL = re.compile(r"/order(s|-status)?/|order[-_]?success|payment[-_]?success", re.I)
+PAYMENT_DONE_XPATH = (
+    "//*[self::h1 or self::h2 or self::h3 or self::div or self::span]"
+    "[contains(text(), 'Order placed') or contains(text(), 'order placed')"
+    " or contains(text(), 'Order confirmed') or contains(text(), 'Payment successful')]"
+)
+
+
+def wait_until(condition, timeout=None, poll=0.25, message=""):
+    """Poll ``condition()`` until it returns something truthy, or time out"""
+    timeout = Config.SELENIUM_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            value = condition()
+            if value:
+                return value
+        except StaleElementReferenceException:
+            pass
+        if time.monotonic() >= deadline:
+            raise TimeoutException(message or f"Condition not met within {timeout}s")
+        time.sleep(poll)
+
+
+def wait_for_dom_ready(driver, timeout=None):
+    """Wait for ``document.readyState == 'complete'``"""
+    return wait_until(
+        lambda: driver.execute_script("return document.readyState") == "complete",
+        timeout, message="Page did not finish loading",
+    )
+
+
+def wait_for_network_idle(driver, quiet_ms=500, timeout=None):
+    """Wait until no resource has finished loading for ``quiet_ms``"""
+    def idle():
+        now, last = driver.execute_script(NETWORK_ACTIVITY_SCRIPT)
+        return now - last >= quiet_ms
+    return wait_until(idle, timeout, poll=0.1, message="Network did not go idle")
+
+
+def wait_for_page(driver, timeout=None, quiet_ms=500):
+    """DOM ready plus network idle, sharing one deadline; returns seconds waited.
+
+    A page that keeps polling in the background still counts as ready once the
+    deadline passes, since the DOM itself has loaded by then.
+    """
+    timeout = Config.SELENIUM_TIMEOUT if timeout is None else timeout
+    started = time.monotonic()
+    wait_for_dom_ready(driver, timeout)
+    try:
+        wait_for_network_idle(driver, quiet_ms, max(0.5, timeout - (time.monotonic() - started)))
+    except TimeoutException:
+        pass
+    return time.monotonic() - started
+
+
+def wait_for_clickable(driver, locators, timeout=None):
+    """First element clickable under any of ``locators`` (tried together, not one after another).
+
+    ``locators`` is one (By, value) pair, a WebElement, or a list of either.
+    """
+    if not isinstance(locators, list):
+        locators = [locators]
+    conditions = [EC.element_to_be_clickable(locator) for locator in locators]
+
+    def first_clickable(d):
+        for condition in conditions:
+            element = condition(d)
+            if element:
+                return element
+        return False
+
+    timeout = Config.SELENIUM_TIMEOUT if timeout is None else timeout
+    return WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+        first_clickable, f"None of {len(conditions)} locators became clickable"
+    )
+
+
+def wait_for_click_effect(element, timeout=5):
+    """Wait for a clicked ADD button to turn into the quantity stepper (or go away).
+
+    Returns False instead of raising when nothing changed, as the click may
+    still have registered.
+    """
+    def changed():
+        try:
+            return not element.is_displayed() or "add" not in element.text.lower()
+        except StaleElementReferenceException:
+            return True
+    try:
+        return wait_until(changed, timeout, poll=0.1)
+    except TimeoutException:
+        return False
+
+
+def wait_for_text_change(element, before, timeout=5):
+    """Wait for ``element``'s text to differ from ``before`` (e.g. a stepper count going up).
+
+    Returns False instead of raising when it stays the same.
+    """
+    def changed():
+        try:
+            return element.text != before
+        except StaleElementReferenceException:
+            return True
+    try:
+        return wait_until(changed, timeout, poll=0.1)
+    except TimeoutException:
+        return False
+
+
+def wait_for_payment(driver, timeout=None):
+    """Wait for the order confirmation after a UPI request; False if it never came.
+
+    Returns as soon as Blinkit shows an order/success page instead of always
+    holding the browser for the whole payment window.
+    """
+    timeout = Config.PAYMENT_TIMEOUT_SECONDS if timeout is None else timeout
+
+    def paid():
+        if PAYMENT_DONE_URL.search(driver.current_url or ""):
+            return True
+        return bool(driver.find_elements(By.XPATH, PAYMENT_DONE_XPATH))
+    try:
+        return wait_until(paid, timeout, poll=2, message="Payment not confirmed")
+    except TimeoutException:
+        return False
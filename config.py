@@ -9,6 +9,15 @@ class Config:
     HEADLESS = os.getenv("HEADLESS", "True") == "True"
     PINCODE = os.getenv("PINCODE", "")
     SELENIUM_TIMEOUT = int(os.getenv("SELENIUM_TIMEOUT", "15"))
+    # Explicit chromedriver binary; when unset it is resolved once and cached in data/
+    CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", "")
+    # Upper bound on Chrome instances alive at once in one process; size to the host's cores/RAM
+    MAX_CHROME_INSTANCES = int(os.getenv("MAX_CHROME_INSTANCES", "2"))
+    # Seconds to wait for a free Chrome slot before giving up
+    CHROME_SLOT_TIMEOUT = int(os.getenv("CHROME_SLOT_TIMEOUT", "600"))
+    # Recycle pooled browsers after this many seconds or checkouts
+    DRIVER_MAX_AGE_SECONDS = int(os.getenv("DRIVER_MAX_AGE_SECONDS", "1800"))
+    DRIVER_MAX_USES = int(os.getenv("DRIVER_MAX_USES", "20"))
     
     # Database
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///green_shelf.db")
@@ -23,4 +32,60 @@ class Config:
     
     # Blinkit automation
     BLINKIT_BASE_URL = "https://www.blinkit.com"
-    AUTOMATION_BACKEND_URL = os.getenv("AUTOMATION_BACKEND_URL", "")
\ No newline at end of file
+    AUTOMATION_BACKEND_URL = os.getenv("AUTOMATION_BACKEND_URL", "")
+    # How often each process re-reads the product link catalog to pick up imports
+    PRODUCT_LINK_RELOAD_SECONDS = int(os.getenv("PRODUCT_LINK_RELOAD_SECONDS", "300"))
+    # How long a search query -> product page mapping is trusted before searching again
+    PRODUCT_URL_TTL_HOURS = int(os.getenv("PRODUCT_URL_TTL_HOURS", "168"))
+    # How long each process reuses a user's saved cookies before re-reading them
+    COOKIE_CACHE_SECONDS = int(os.getenv("COOKIE_CACHE_SECONDS", "300"))
+    # Read search results from Blinkit's JSON API responses (needs Chrome's performance log)
+    NETWORK_CAPTURE = os.getenv("NETWORK_CAPTURE", "False") == "True"
+    NETWORK_CAPTURE_URL_PATTERN = os.getenv("NETWORK_CAPTURE_URL_PATTERN", r"/v\d+/(layout/)?search|/v\d+/listing")
+    # Debug screenshots/HTML: all, sampled (failures + a share of successes), failure, off
+    DEBUG_CAPTURE = os.getenv("DEBUG_CAPTURE", "sampled")
+    DEBUG_CAPTURE_SAMPLE_RATE = float(os.getenv("DEBUG_CAPTURE_SAMPLE_RATE", "0.1"))
+    # Artifacts waiting for the background writer before new ones are dropped
+    DEBUG_CAPTURE_QUEUE_SIZE = int(os.getenv("DEBUG_CAPTURE_QUEUE_SIZE", "32"))
+    # Stored screenshot encoding (webp, jpeg or png) and lossy quality
+    DEBUG_SCREENSHOT_FORMAT = os.getenv("DEBUG_SCREENSHOT_FORMAT", "webp")
+    DEBUG_SCREENSHOT_QUALITY = int(os.getenv("DEBUG_SCREENSHOT_QUALITY", "60"))
+    # data/screenshots budgets, enforced by the debug writer every DEBUG_RETENTION_INTERVAL_SECONDS
+    DEBUG_MAX_AGE_HOURS = int(os.getenv("DEBUG_MAX_AGE_HOURS", "168"))
+    DEBUG_MAX_TOTAL_MB = int(os.getenv("DEBUG_MAX_TOTAL_MB", "200"))
+    DEBUG_RETENTION_INTERVAL_SECONDS = int(os.getenv("DEBUG_RETENTION_INTERVAL_SECONDS", "300"))
+    # Browsers filling one order's cart at once (each counts against MAX_CHROME_INSTANCES)
+    CART_PARALLEL_SESSIONS = int(os.getenv("CART_PARALLEL_SESSIONS", "1"))
+    # How long to wait for a pool slot for each extra session before going without it
+    CART_PARALLEL_SLOT_TIMEOUT = int(os.getenv("CART_PARALLEL_SLOT_TIMEOUT", "5"))
+    # Cap on packs of one item added to cover a low-stock shortfall
+    MAX_PACKS_PER_ITEM = int(os.getenv("MAX_PACKS_PER_ITEM", "10"))
+    # Read the cart before adding and only add (or step up) what it is missing
+    CART_DIFF = os.getenv("CART_DIFF", "True") == "True"
+    # Search each cart item from the page already open instead of reloading the home page
+    IN_PAGE_SEARCH = os.getenv("IN_PAGE_SEARCH", "True") == "True"
+    # Longest to wait for Blinkit to confirm a UPI payment before giving up
+    PAYMENT_TIMEOUT_SECONDS = int(os.getenv("PAYMENT_TIMEOUT_SECONDS", "360"))
+    # "Lean" browsing blocks heavy resources through DevTools; callers can override per call
+    LEAN_BROWSING = os.getenv("LEAN_BROWSING", "False") == "True"
+    LEAN_BLOCKED_RESOURCE_TYPES = os.getenv("LEAN_BLOCKED_RESOURCE_TYPES", "image,font,media")
+    LEAN_BLOCKED_URL_PATTERNS = os.getenv(
+        "LEAN_BLOCKED_URL_PATTERNS",
+        "*google-analytics.com*,*googletagmanager.com*,*doubleclick.net*,*connect.facebook.net*,*clarity.ms*,*hotjar.com*",
+    )
+    
+    # Auto-order scheduler
+    # Web workers leave the scheduler to `python -m app.scheduler`; `python run.py` starts its own
+    SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "False") == "True"
+    SCHEDULER_LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", "120"))
+    # Items ordered (pending/placed) within this window are not re-ordered
+    REORDER_DEDUP_MINUTES = int(os.getenv("REORDER_DEDUP_MINUTES", "720"))
+    # How long after it started an interrupted bot run stays resumable by the user's next order pass
+    BOT_RUN_RESUME_MINUTES = int(os.getenv("BOT_RUN_RESUME_MINUTES", "60"))
+    # Users whose bot sessions may run concurrently
+    AUTO_ORDER_WORKERS = int(os.getenv("AUTO_ORDER_WORKERS", "2"))
+    # Workers for orders/searches queued from web requests
+    ORDER_JOB_WORKERS = int(os.getenv("ORDER_JOB_WORKERS", "2"))
+    SCHEDULER_POLL_SECONDS = int(os.getenv("SCHEDULER_POLL_SECONDS", "30"))
+    # How often the scheduler collects reorder events queued by other processes
+    REORDER_EVENT_POLL_SECONDS = int(os.getenv("REORDER_EVENT_POLL_SECONDS", "5"))
\ No newline at end of file
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Bulk-import direct Blinkit product links into the ProductLink catalog.
+
+Usage: python import_product_links.py [file.json] [--replace]
+
+The file holds either {"name": "url", ...} or [{"name": ..., "url": ...}, ...];
+it defaults to data/product_links.json. With --replace, catalog entries missing
+from the file are deleted.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from app import create_app
+from app.product_links import import_product_links, SEED_FILE
+
+def import_links(path, replace=False):
+    """Load ``path`` into the catalog"""
+    app = create_app(with_scheduler=False)
+
+    with app.app_context():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            added, updated, removed = import_product_links(entries, replace=replace)
+            print(f"Product links: {added} added, {updated} updated, {removed} removed.")
+            return True
+        except Exception as e:
+            print(f"Import failed: {e}")
+            return False
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--replace"]
+    path = Path(args[0]) if args else SEED_FILE
+    print(f"Importing product links from {path}...")
+    success = import_links(path, replace="--replace" in sys.argv)
+    if success:
+        print("Import completed successfully!")
+    else:
+        print("Import failed!")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+One-time migration of saved Blinkit cookies from cookies_<user_id>.pkl files
+into User.blinkit_cookies.
+
+Usage: python migrate_cookie_pickles.py [directory]
+
+Only run this on pickle files this app wrote itself: unpickling runs arbitrary
+code, which is why the app no longer reads them. Migrated files are renamed to
+*.pkl.migrated; delete them once orders work.
+"""
+
+import pickle
+import re
+import sys
+from pathlib import Path
+
+from app import create_app
+from app.models import db, User
+from app.cookie_store import save_user_cookies
+
+COOKIE_FILE = re.compile(r"^cookies_(\d+)\.pkl$")
+
+def migrate_cookies(directory):
+    """Move every cookies_<id>.pkl in ``directory`` onto its user's row"""
+    app = create_app(with_scheduler=False)
+
+    with app.app_context():
+        try:
+            migrated = 0
+            for path in sorted(Path(directory).iterdir()):
+                match = COOKIE_FILE.match(path.name)
+                if not match:
+                    continue
+                user = db.session.get(User, int(match.group(1)))
+                if user is None:
+                    print(f"Skipping {path.name}: no user {match.group(1)}")
+                    continue
+                with open(path, "rb") as f:
+                    cookies = pickle.load(f)
+                save_user_cookies(user, [dict(cookie) for cookie in cookies])
+                db.session.commit()
+                path.rename(path.with_name(path.name + ".migrated"))
+                print(f"Migrated {len(cookies)} cookies for {user.username}")
+                migrated += 1
+            print(f"Migrated cookies for {migrated} users.")
+            return True
+        except Exception as e:
+            db.session.rollback()
+            print(f"Migration failed: {e}")
+            return False
+
+if __name__ == "__main__":
+    directory = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent
+    print(f"Migrating cookie pickles from {directory}...")
+    success = migrate_cookies(directory)
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
@@ -11,7 +11,7 @@ from app.models import db, User, InventoryItem
 
 def migrate_inventory_data():
     """Migrate inventory data from JSON to database"""
-    app = create_app()
+    app = create_app(with_scheduler=False)
     
     with app.app_context():
         # Check if we have old inventory data
@@ -74,7 +74,7 @@ def migrate_inventory_data():
 
 def migrate_settings_data():
     """Migrate settings data from JSON to database"""
-    app = create_app()
+    app = create_app(with_scheduler=False)
     
     with app.app_context():
         old_settings_file = Path("data/settings.json")
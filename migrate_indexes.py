@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Database migration script to create indexes added to existing tables.
+
+db.create_all() only creates indexes together with new tables, so databases
+created before an index was added to a model need this run once.
+"""
+
+from app import create_app
+from app.models import db, InventoryItem
+
+# Tables whose model-declared indexes may be missing from older databases
+TABLES = [
+    InventoryItem.__table__,
+]
+
+def migrate_indexes():
+    """Create any model-declared index that doesn't exist yet"""
+    app = create_app(with_scheduler=False)
+    
+    with app.app_context():
+        try:
+            for table in TABLES:
+                for index in table.indexes:
+                    index.create(db.engine, checkfirst=True)
+                    print(f"Index {index.name} is present on {table.name}.")
+            return True
+        except Exception as e:
+            print(f"Migration failed: {e}")
+            return False
+
+if __name__ == "__main__":
+    print("Running database migration for indexes...")
+    success = migrate_indexes()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
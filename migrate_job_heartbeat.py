@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the heartbeat_at field to the OrderJob table.
+
+The scheduler only fails another worker's running job once it has recorded no
+step for a while; databases created before the column existed need this run once.
+"""
+
+import sqlite3
+from pathlib import Path
+
+def migrate_database():
+    """Add heartbeat_at to order_job if it doesn't exist"""
+    
+    # Get the database path
+    db_path = Path(__file__).parent / "instance" / "green_shelf.db"
+    
+    if not db_path.exists():
+        print("Database not found. Please run the application first to create the database.")
+        return False
+    
+    try:
+        conn = sqlite3.connect(str(db_path))
+        cursor = conn.cursor()
+        
+        cursor.execute("PRAGMA table_info(order_job)")
+        columns = [column[1] for column in cursor.fetchall()]
+        
+        if not columns:
+            print("order_job table not created yet; the app will create it with the column.")
+            conn.close()
+            return True
+        
+        if 'heartbeat_at' in columns:
+            print("heartbeat_at column already exists. Migration not needed.")
+            conn.close()
+            return True
+        
+        cursor.execute("ALTER TABLE order_job ADD COLUMN heartbeat_at DATETIME")
+        conn.commit()
+        
+        print("Successfully added heartbeat_at column to OrderJob table.")
+        conn.close()
+        return True
+        
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        if 'conn' in locals():
+            conn.close()
+        return False
+
+if __name__ == "__main__":
+    print("Running database migration for heartbeat_at field...")
+    success = migrate_database()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
@@ -1,6 +1,8 @@
 from app import create_app
 
-app = create_app()
-
 if __name__ == "__main__":
-    app.run(debug=True)
+    # Local development: this one process serves the web app and runs the scheduler
+    create_app(with_scheduler=True).run(debug=True)
+else:
+    # WSGI workers (gunicorn run:app) leave orders to `python -m app.scheduler`
+    app = create_app()
@@ -1,24 +1,61 @@
-from selenium import webdriver
-import pickle
+#!/usr/bin/env python3
+"""
+Log in to Blinkit by hand and save the session's cookies on a Green Shelf user.
+
+Usage: python save_cookies.py <username>
+
+The cookies go to User.blinkit_cookies, where the bot and app.py read them.
+"""
+
+import sys
 import time
 
-options = webdriver.ChromeOptions()
-options.add_argument("--start-maximized")
+from selenium import webdriver
+
+from app import create_app
+from app.models import db, User
+from app.cookie_store import save_user_cookies
+from bot.drivers import chrome_service
+
+def save_cookies(username):
+    """Open Blinkit for a manual login, then store its cookies on ``username``"""
+    app = create_app(with_scheduler=False)
+
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            print(f"No user named '{username}'.")
+            return False
 
-# Use a clean custom profile (no lock conflicts)
-options.add_argument(r"--user-data-dir=C:\\Users\\HP\\SeleniumProfile")
-options.add_argument(r"--profile-directory=Automation")
+        options = webdriver.ChromeOptions()
+        options.add_argument("--start-maximized")
 
-driver = webdriver.Chrome(options=options)
+        # Use a clean custom profile (no lock conflicts)
+        options.add_argument(r"--user-data-dir=C:\\Users\\HP\\SeleniumProfile")
+        options.add_argument(r"--profile-directory=Automation")
 
-# Open Blinkit and allow manual login
-driver.get("https://www.blinkit.com")
-print("Please log in manually within the next 60 seconds...")
-time.sleep(60)
+        driver = webdriver.Chrome(service=chrome_service(), options=options)
+        try:
+            # Open Blinkit and allow manual login
+            driver.get("https://www.blinkit.com")
+            print("Please log in manually within the next 60 seconds...")
+            time.sleep(60)
 
-# Save cookies
-with open("cookies.pkl", "wb") as file:
-    pickle.dump(driver.get_cookies(), file)
+            cookies = driver.get_cookies()
+            save_user_cookies(user, cookies)
+            db.session.commit()
+            print(f"Saved {len(cookies)} cookies for {user.username}")
+            return True
+        except Exception as e:
+            db.session.rollback()
+            print(f"Saving cookies failed: {e}")
+            return False
+        finally:
+            driver.quit()
 
-print("Cookies saved to cookies.pkl")
-driver.quit()
\ No newline at end of file
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python save_cookies.py <username>")
+        sys.exit(1)
+    if not save_cookies(sys.argv[1]):
+        sys.exit(1)
@@ -0,0 +1,34 @@
+"""Compare Blinkit page loads with the full and the lean browsing profile.
+
+Usage: python scripts/compare_lean_profile.py [url] [runs]
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bot.drivers import driver_pool, set_lean_mode, page_load_stats, format_page_stats
+
+url = sys.argv[1] if len(sys.argv) > 1 else "https://www.blinkit.com/"
+runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+pooled = driver_pool.checkout(headless=True)
+try:
+    for lean in (False, True):
+        set_lean_mode(pooled.driver, lean)
+        samples = []
+        for _ in range(runs):
+            # Start from a blank page with an empty cache so runs are comparable
+            pooled.driver.get("about:blank")
+            pooled.driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            pooled.driver.get(url)
+            stats = page_load_stats(pooled.driver)
+            samples.append(stats)
+            print(f"lean={'on ' if lean else 'off'} {format_page_stats(stats)}")
+        loads = [s['load_ms'] for s in samples if s.get('load_ms') is not None]
+        total_bytes = [s.get('bytes', 0) for s in samples]
+        if loads:
+            print(f"lean={'on ' if lean else 'off'} average: load {sum(loads) / len(loads):.0f} ms, "
+                  f"{sum(total_bytes) / len(total_bytes) / 1024:.0f} KB")
+finally:
+    driver_pool.checkin(pooled, healthy=False)
@@ -1,7 +1,7 @@
 from app import create_app
 from flask import render_template
 
-app = create_app()
+app = create_app(with_scheduler=False)
 # allow url_for and other url building outside request
 app.config['SERVER_NAME'] = 'localhost:5000'
 with app.app_context():
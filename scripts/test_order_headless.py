@@ -1,7 +1,7 @@
 from app import create_app
 from unittest.mock import patch
 
-app = create_app()
+app = create_app(with_scheduler=False)
 app.config['SERVER_NAME'] = 'localhost'
 app.config['WTF_CSRF_ENABLED'] = False
 
@@ -15,12 +15,21 @@ with app.test_client() as client:
             'grocery_list': 'amul milk 500ml\nenglish oven sandwich white bread'
         }
 
-        # Patch the GreenShelfBot to avoid real Selenium calls
-        with patch('app.routes.GreenShelfBot') as MockBot:
-            instance = MockBot.return_value
-            instance.process_items.return_value = ['✅ item added']
-            instance.proceed_to_checkout_and_select_upi.return_value = ['✅ UPI triggered']
+        resp = client.post('/order', data=data, follow_redirects=True)
+        print('Status code:', resp.status_code)
+        print('Response data snippet:', resp.data[:500])
 
-            resp = client.post('/order', data=data, follow_redirects=True)
-            print('Status code:', resp.status_code)
-            print('Response data snippet:', resp.data[:500])
+        # The route only queues a job; run it here with GreenShelfBot patched
+        # to avoid real Selenium calls
+        from app.jobs import run_job
+        from app.models import OrderJob
+        job = OrderJob.query.order_by(OrderJob.id.desc()).first()
+        if job is not None:
+            with patch('bot.green_shelf_bot.GreenShelfBot') as MockBot:
+                instance = MockBot.return_value
+                instance.process_items.return_value = ['✅ item added']
+                instance.item_timings = [{'item': 'item', 'seconds': 1.0, 'via': 'search', 'reloads': 0, 'ok': True}]
+                instance.proceed_to_checkout_and_select_upi.return_value = ['✅ UPI triggered']
+
+                print('Job status:', run_job(job.id))
+                print('Job:', job.to_dict())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for matching requested items against the lines already in the Blinkit cart
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from bot.cart_state import CartLine, cart_delta, cart_line_for, in_cart
+
+def line(text, quantity=1):
+    return CartLine(text, quantity, None, None)
+
+def test_whole_words_only():
+    """"milk" never claims a "butter milk" or "milkshake" line of another size"""
+    lines = [line("amul butter milk 200 ml"), line("milkshake 500 ml")]
+    assert cart_line_for("milk 500 ml", lines) is None
+    assert in_cart("egg", ["eggplant 500 g"]) is False
+    assert in_cart("amul milk", ["amul taaza milk 500 ml"]) is True
+
+def test_size_must_match():
+    lines = [line("amul taaza milk 1 l"), line("amul taaza milk 500 ml", 2)]
+    assert cart_line_for("amul taaza milk 500ml", lines) is lines[1]
+    assert cart_line_for("amul taaza milk 1000 ml", lines) is lines[0]
+
+def test_sizeless_query_matches_nothing():
+    """Without a size in the query or a known one, variants can't be told apart"""
+    lines = [line("amul taaza milk 500 ml")]
+    assert cart_line_for("amul taaza milk", lines) is None
+    assert cart_line_for("amul taaza milk", lines, size=("volume", 500.0)) is lines[0]
+
+def test_delta_in_request_order():
+    lines = [line("amul taaza milk 500 ml", 2), line("brown bread 400 g", 1)]
+    requests = [("brown bread 400 g", 1), ("amul taaza milk 500 ml", 5), ("eggs 6 pcs", 1)]
+    assert cart_delta(requests, lines) == [(lines[1], 0), (lines[0], 3), (None, 1)]
+
+def test_delta_uses_known_sizes():
+    lines = [line("amul taaza milk 500 ml", 1)]
+    assert cart_delta([("amul taaza milk", 2)], lines) == [(None, 2)]
+    assert cart_delta([("amul taaza milk", 2)], lines, {"amul taaza milk": ("volume", 500.0)}) == [(lines[0], 1)]
+
+def test_unreadable_cart_adds_everything():
+    assert cart_delta([("milk 500 ml", 2)], None) == [(None, 2)]
+    assert cart_delta([("milk 500 ml", 2)], []) == [(None, 2)]
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
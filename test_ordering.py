@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for order de-duplication and mapping the bot's results back to order lines
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+import app.ordering as ordering
+from app.ordering import filter_new_items, finish_order, order_item, item_query
+
+def order_with(*queries):
+    return SimpleNamespace(status='pending', lines=[SimpleNamespace(blinkit_query=q, status='pending') for q in queries])
+
+def test_filter_keeps_first_item_per_query(monkeypatch):
+    monkeypatch.setattr(ordering, 'in_flight_queries', lambda user_id, queries, window=None: {'bread'})
+    items = [order_item('milk', 3, 'L'), 'bread', order_item('milk', 1, 'L'), 'eggs']
+    new, suppressed = filter_new_items(1, items)
+    assert new == [order_item('milk', 3, 'L'), 'eggs']
+    assert suppressed == ['bread']
+    assert [item_query(item) for item in new] == ['milk', 'eggs']
+
+def test_results_map_to_lines_by_index():
+    order = order_with('milk', 'bread', 'eggs')
+    placed = finish_order(order, ['✅ milk added to cart.', '❌ Failed to add bread', '✅ eggs is already in the cart.'])
+    assert placed == 2
+    assert [line.status for line in order.lines] == ['placed', 'failed', 'placed']
+    assert order.status == 'placed'
+
+def test_missing_results_fail_their_lines():
+    order = order_with('milk', 'bread')
+    assert finish_order(order, ['✅ milk added to cart.']) == 1
+    assert [line.status for line in order.lines] == ['placed', 'failed']
+
+def test_crashed_run_fails_the_order():
+    order = order_with('milk', 'bread')
+    assert finish_order(order, None) == 0
+    assert [line.status for line in order.lines] == ['failed', 'failed']
+    assert order.status == 'failed'
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
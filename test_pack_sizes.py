@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for pack-size parsing and the number of packs a low-stock shortfall needs
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from app.pack_sizes import packs_needed, exact_pack_size
+from bot.units import parse_amount, parse_size, all_sizes, strip_sizes, same_size
+
+def test_parse_size_units():
+    """Sizes are converted to the base unit of their dimension"""
+    assert parse_size("Amul Milk 500 ml") == ("volume", 500.0)
+    assert parse_size("1.5L") == ("volume", 1500.0)
+    assert parse_size("atta 5 kg") == ("mass", 5000.0)
+    assert parse_size("eggs 6 pcs") == ("count", 6.0)
+    assert parse_size("milk") is None
+
+def test_parse_size_skips_unknown_units():
+    """A number with an unknown word ("5 star") isn't taken for the size"""
+    assert parse_size("5 star chocolate 40 g") == ("mass", 40.0)
+    assert parse_amount(2, "boxes") is None
+
+def test_sizes_in_text():
+    assert all_sizes("milk 500 ml x 2 pcs") == [("volume", 500.0), ("count", 2.0)]
+    assert strip_sizes("Amul Milk 500 ml").split() == ["amul", "milk"]
+    assert same_size(("volume", 1000.0), parse_size("1 l"))
+    assert not same_size(("volume", 500.0), ("mass", 500.0))
+
+def test_packs_cover_shortfall():
+    """3 L short of a 500 ml milk is 6 packs"""
+    assert packs_needed("amul milk 500 ml", 3, "L", max_packs=10) == 6
+    assert packs_needed("amul milk 500 ml", 1.2, "L", max_packs=10) == 3
+
+def test_packs_capped():
+    assert packs_needed("amul milk 500 ml", 20, "L", max_packs=10) == 10
+
+def test_dimension_mismatch_is_one_pack():
+    """Grams of a product sold in millilitres can't be converted"""
+    assert packs_needed("amul milk 500 ml", 500, "g", max_packs=10) == 1
+
+def test_unknown_size_is_one_pack():
+    """A loose query doesn't say the size of the search result the bot adds"""
+    assert exact_pack_size("butter") is None
+    assert packs_needed("butter", 1, "kg", max_packs=10) == 1
+    assert packs_needed("milk", None, None, max_packs=10) == 1
+
+def test_exact_catalog_name_size():
+    """The catalog entry for exactly the query's name gives the size"""
+    assert exact_pack_size("Amul Taaza Toned Milk") == ("volume", 500.0)
+    assert packs_needed("amul taaza toned milk", 2, "L", max_packs=10) == 4
+
+def test_counted_units_without_pack_size():
+    assert packs_needed("bread", 2, "pcs", max_packs=10) == 2
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
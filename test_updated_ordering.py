@@ -20,15 +20,9 @@ try:
 except ImportError:
     WEBDRIVER_MANAGER_AVAILABLE = False
 
-# Updated product links (validated)
-UPDATED_PRODUCT_LINKS = {
-    "amul milk 500ml": "https://blinkit.com/prn/amul-taaza-toned-milk/prid/23",
-    "gokul full cream milk": "https://blinkit.com/prn/gokul-full-cream-milk/prid/31",
-    "mother dairy cow milk": "https://blinkit.com/prn/mother-dairy-cow-milk/prid/25",
-    "english oven sandwich white bread": "https://blinkit.com/prn/english-oven-sandwich-white-bread/prid/24",
-    "britannia bread": "https://blinkit.com/prn/britannia-white-bread/prid/26",
-    "corn flakes": "https://blinkit.com/prn/corn-flakes/prid/27"
-}
+from app import create_app
+from app.product_links import find_product_links
+
 
 def create_enhanced_chrome_driver(headless=False):
     """Create Chrome driver with optimal settings for Blinkit"""
@@ -77,6 +71,10 @@ def test_updated_grocery_ordering(grocery_list, upi_id, headless=False):
     
     driver = None
     results = []
+
+    # Direct product links come from the shared ProductLink catalog
+    with create_app(with_scheduler=False).app_context():
+        direct_links = find_product_links(grocery_list)
     
     try:
         # Create driver
@@ -134,9 +132,9 @@ def test_updated_grocery_ordering(grocery_list, upi_id, headless=False):
             
             try:
                 # Check if we have a direct link
-                if item in UPDATED_PRODUCT_LINKS:
+                if item in direct_links:
                     print(f"📎 Using direct link for: {item}")
-                    driver.get(UPDATED_PRODUCT_LINKS[item])
+                    driver.get(direct_links[item])
                     time.sleep(4)
                     
                     # Updated ADD button selector